@@ -0,0 +1,180 @@
+import time
+from collections import OrderedDict
+import numpy as np
+from SearchEngine import ALGORITHMS, newStats, prepareGrid, toIndex
+
+# answers lots of start->end queries on one wall layout without redoing the same work for every query:
+#  - connected component labels, so a query between two cells that arent connected is rejected straight away
+#  - shortest path trees (a BFS over the whole map) rooted at any cell that shows up in several queries, every
+#    query sharing that start or end then just follows the tree instead of searching
+#  - an LRU cache of results keyed on (map version, algorithm, start, end)
+# the map version goes up whenever the walls change (setGrid or invalidate), which throws all of the above away, e.g.
+#   queries = BatchSearch(walls)
+#   results = queries.queryMany([((0, 0), (99, 99)), ((5, 5), (99, 99)), ...])
+
+OPTIMAL = {'A*', 'Dijkstra', 'BFS', 'Bidirectional A*', 'JPS'}  # searches any shortest path can stand in for
+
+
+class BatchSearch:
+    def __init__(self, grid=None, cache_size=4096, tree_limit=16, tree_threshold=2):
+        self.version = 0
+        self.cache_size = cache_size          # most results kept in the cache
+        self.tree_limit = tree_limit          # most trees kept, each one is an int32 per cell
+        self.tree_threshold = tree_threshold  # queries on one cell in a batch before its worth building its tree
+        self.results = OrderedDict()          # (version, algorithm, start, end) -> (path, stats), oldest first
+        self.trees = OrderedDict()            # root index -> array of the next step towards the root for each cell
+        self.walls = None
+        self.prepared = None                  # prepareGrid tuple, shared by every search on this map
+        self.labels = None                    # component number per padded cell (0 for walls), built when needed
+        if grid is not None:
+            self.setGrid(grid)
+
+    def setGrid(self, grid):
+        self.invalidate()
+        self.walls = np.array(grid, dtype=bool)
+        self.prepared = prepareGrid(self.walls)
+
+    def invalidate(self):
+        # call whenever the walls change, everything worked out for the old walls is dropped
+        self.version += 1
+        self.results.clear()
+        self.trees.clear()
+        self.walls = None
+        self.prepared = None
+        self.labels = None
+
+    def cached(self, algorithm, start, end):
+        # (path, stats) if this query has already been answered on the current walls, else None
+        key = (self.version, algorithm, tuple(start), tuple(end))
+        if key not in self.results:
+            return None
+        self.results.move_to_end(key)  # most recently used goes to the back
+        path, stats = self.results[key]
+        return list(path), dict(stats, method='cache')
+
+    def store(self, algorithm, start, end, path, stats):
+        stats = {name: value for name, value in stats.items() if name != 'visited'}  # no need to keep a whole mask
+        self.results[(self.version, algorithm, tuple(start), tuple(end))] = (list(path), stats)
+        if len(self.results) > self.cache_size:
+            self.results.popitem(last=False)  # drop the least recently used
+
+    def componentLabels(self):
+        # gives every group of connected open cells its own number, flood filling one group at a time
+        if self.labels is None:
+            blocked, rows, cols, width = self.prepared
+            labels = [0] * len(blocked)
+            moves = (-width, -1, width, 1)
+            label = 0
+            for cell in range(len(blocked)):
+                if blocked[cell] or labels[cell]:
+                    continue
+                label += 1
+                labels[cell] = label
+                frontier = [cell]
+                while frontier:
+                    current = frontier.pop()
+                    for move in moves:
+                        child = current + move
+                        if not blocked[child] and not labels[child]:
+                            labels[child] = label
+                            frontier.append(child)
+            self.labels = labels
+        return self.labels
+
+    def tree(self, root):
+        # shortest path tree for the given root index: for every cell reachable from it, the next cell towards the root.
+        # a BFS since every step costs the same, and since moves go both ways it works for paths to or from the root.
+        if root in self.trees:
+            self.trees.move_to_end(root)
+            return self.trees[root]
+        blocked, rows, cols, width = self.prepared
+        towards = [-1] * len(blocked)
+        towards[root] = root
+        moves = (-width, -1, width, 1)
+        frontier = [root]
+        while frontier:
+            next_frontier = []
+            for current in frontier:
+                for move in moves:
+                    child = current + move
+                    if not blocked[child] and towards[child] == -1:
+                        towards[child] = current
+                        next_frontier.append(child)
+            frontier = next_frontier
+        self.trees[root] = np.array(towards, dtype=np.int32)
+        if len(self.trees) > self.tree_limit:
+            self.trees.popitem(last=False)
+        return self.trees[root]
+
+    def treePath(self, tree, cell, root, width):
+        # follows the tree (as a list) from cell to its root, returns the (row, col) path
+        indices = [cell]
+        while cell != root:
+            cell = tree[cell]
+            indices.append(cell)
+        rows, cols = np.divmod(np.array(indices), width)  # turn them all into positions at once at the end
+        return list(zip((rows - 1).tolist(), (cols - 1).tolist()))
+
+    def query(self, start, end, algorithm='A*'):
+        return self.queryMany([(start, end)], algorithm)[0]
+
+    def queryMany(self, pairs, algorithm='A*'):
+        # answers each (start, end) pair, returns a list of (path, stats) in the same order.
+        # stats['method'] says how it was answered: 'cache', 'unreachable', 'tree' or 'search'
+        if self.prepared is None:
+            raise ValueError("BatchSearch has no grid, call setGrid first")
+        blocked, rows, cols, width = self.prepared
+        labels = self.componentLabels()
+        results = [None] * len(pairs)
+        waiting = []  # (position in results, start index, end index) for queries that still need working out
+        for number, (start, end) in enumerate(pairs):
+            found = self.cached(algorithm, start, end)
+            if found is not None:
+                results[number] = found
+                continue
+            source, target = toIndex(start, width), toIndex(end, width)
+            if labels[source] == 0 or labels[source] != labels[target]:  # wall, or not connected, so no path
+                stats = newStats()
+                stats['method'] = 'unreachable'
+                results[number] = ([], stats)
+                self.store(algorithm, start, end, [], stats)
+                continue
+            waiting.append((number, source, target))
+
+        uses = {}  # how many of the waiting queries start or end on each cell
+        for number, source, target in waiting:
+            uses[source] = uses.get(source, 0) + 1
+            uses[target] = uses.get(target, 0) + 1
+
+        # pick a root for each query: whichever end has a tree already, or is shared the most (if its shared enough).
+        # queries are then done root by root, so each tree gets built once per batch however many queries use it
+        plans = []
+        for number, source, target in waiting:
+            root, other = (target, source) if uses[target] >= uses[source] else (source, target)
+            if other in self.trees and root not in self.trees:
+                root, other = other, root
+            if algorithm not in OPTIMAL or (root not in self.trees and uses[root] < self.tree_threshold):
+                root = -1  # not worth a tree, just search
+            plans.append((root, number, source, target))
+        plans.sort()
+
+        towards, towards_root = None, -1
+        for root, number, source, target in plans:
+            start, end = pairs[number]
+            t0 = time.perf_counter()
+            if root != -1:
+                if root != towards_root:  # plans are sorted by root, so this happens once per tree
+                    towards, towards_root = self.tree(root).tolist(), root  # lists index quicker than arrays
+                path = self.treePath(towards, target if root == source else source, root, width)
+                if root == source:
+                    path = path[::-1]  # tree path runs towards the root, so flip it to go start -> end
+                stats = newStats()
+                stats['path_length'] = stats['cost'] = len(path) - 1
+                stats['method'] = 'tree'
+            else:
+                path, stats = ALGORITHMS[algorithm](self.walls, start, end, {'prepared': self.prepared})
+                stats['method'] = 'search'
+            stats['time'] = time.perf_counter() - t0
+            self.store(algorithm, start, end, path, stats)
+            results[number] = path, stats
+        return results
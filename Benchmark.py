@@ -0,0 +1,239 @@
+import argparse
+import csv
+import json
+import random
+import sys
+import time
+import tracemalloc
+import numpy as np
+from SearchEngine import ALGORITHMS, HEURISTICS, TIE_BREAKS, prepareGrid
+from MapFiles import findMap, loadMovingAI, loadScenarios
+from DStarLite import dStarLiteSearch
+from HPAStar import hpaStarSearch
+
+# headless benchmark for the search engine, no window needed.
+# builds seeded maps (same seed + size always gives the same map), runs every search on them and writes the
+# results out as JSON or CSV so runs can be compared over time, e.g.
+#   python Benchmark.py --sizes 20 100 500 --maps open random maze rooms --format csv --output bench.csv
+# maps are numpy bool arrays (True = wall), every generator returns (grid, start, end).
+# it can also run MovingAI scenario files instead, every start/end pair in them on their maps, e.g.
+#   python Benchmark.py --scen arena.map.scen --algorithms A* JPS --format csv
+
+
+def openMap(size, rng):
+    grid = np.zeros((size, size), dtype=bool)  # no walls at all
+    return grid, (0, 0), (size - 1, size - 1)
+
+
+def randomMap(size, rng, density=0.2):
+    grid = rng.random((size, size)) < density  # each cell is a wall with the given chance
+    grid[0, 0] = grid[size - 1, size - 1] = False  # corners kept open for the start/end (might still be cut off)
+    return grid, (0, 0), (size - 1, size - 1)
+
+
+def mazeMap(size, rng):
+    # recursive division maze: keep splitting chambers with a wall that has one gap in it.
+    # walls go on odd rows/cols and gaps on even ones, so every open cell stays connected.
+    grid = np.zeros((size, size), dtype=bool)
+    pick = random.Random(int(rng.integers(2 ** 32)))  # pythons random is much quicker than numpy for single draws
+    chambers = [(0, size - 1, 0, size - 1)]  # (top, bottom, left, right), done with a stack instead of recursion
+    while chambers:
+        top, bottom, left, right = chambers.pop()
+        rows = range(top + 1, bottom, 2)  # odd rows strictly inside the chamber
+        cols = range(left + 1, right, 2)
+        if not rows and not cols:
+            continue
+        horizontal = len(rows) > 0 and (not cols or bottom - top > right - left
+                                        or (bottom - top == right - left and pick.random() < 0.5))
+        if horizontal:
+            wall = pick.choice(rows)
+            grid[wall, left:right + 1] = True
+            grid[wall, left + 2 * pick.randint(0, (right - left) // 2)] = False  # the gap
+            chambers.append((top, wall - 1, left, right))
+            chambers.append((wall + 1, bottom, left, right))
+        else:
+            wall = pick.choice(cols)
+            grid[top:bottom + 1, wall] = True
+            grid[top + 2 * pick.randint(0, (bottom - top) // 2), wall] = False
+            chambers.append((top, bottom, left, wall - 1))
+            chambers.append((top, bottom, wall + 1, right))
+    return grid, (0, 0), (size - 1, size - 1)
+
+
+def roomsMap(size, rng):
+    # rooms and corridors: splits the map into cells, puts a random room in each cell, then joins every room
+    # to its right and lower neighbour with an L shaped corridor. start is in the first room, end in the last.
+    grid = np.ones((size, size), dtype=bool)
+    cell = max(5, min(24, size // 4))
+    count = size // cell
+    centers = {}
+    for i in range(count):
+        for j in range(count):
+            height, width = rng.integers(3, cell - 1, endpoint=True, size=2)
+            top = i * cell + rng.integers(0, cell - height, endpoint=True)
+            left = j * cell + rng.integers(0, cell - width, endpoint=True)
+            grid[top:top + height, left:left + width] = False
+            centers[(i, j)] = (int(top + height // 2), int(left + width // 2))
+    for (i, j), (row, col) in centers.items():
+        for neighbour in ((i, j + 1), (i + 1, j)):
+            if neighbour in centers:
+                to_row, to_col = centers[neighbour]
+                grid[row, min(col, to_col):max(col, to_col) + 1] = False        # along the row...
+                grid[min(row, to_row):max(row, to_row) + 1, to_col] = False     # ...then down the column
+    return grid, centers[(0, 0)], centers[(count - 1, count - 1)]
+
+
+ROUTINES = dict(ALGORITHMS)  # every search that can be benchmarked, the planners are run as one off searches
+ROUTINES['D* Lite'] = dStarLiteSearch
+ROUTINES['HPA*'] = hpaStarSearch
+
+MAPS = {'open': openMap,
+        'random': randomMap,
+        'maze': mazeMap,
+        'rooms': roomsMap}
+
+
+def makeMap(kind, size, seed, density=None):
+    rng = np.random.default_rng([seed, size])  # seeded on size too so each size gets its own (repeatable) map
+    if kind == 'random':
+        return MAPS[kind](size, rng, density)
+    return MAPS[kind](size, rng)
+
+
+def runOne(algorithm, grid, start, end, repeat=1, memory=True, options=None):
+    # times the search (best of repeat runs), then optionally runs it once more under tracemalloc for peak memory.
+    # tracemalloc slows allocation down a lot so it never shares a run with the timing.
+    best_time = None
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        path, stats = ROUTINES[algorithm](grid, start, end, options)
+        elapsed = time.perf_counter() - t0
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+    record = {'algorithm': algorithm,
+              'time': best_time,
+              'expanded': stats['expanded'],
+              'generated': stats['generated'],
+              'peak_open': stats['peak_open'],
+              'reopened': stats['reopened'],
+              'heuristic_calls': stats['heuristic_calls'],
+              'setup_time': stats['setup_time'],
+              'peak_memory': None,
+              'path_length': stats['path_length'],
+              'cost': stats['cost'] if path else None,
+              'found': bool(path)}
+    if memory:
+        tracemalloc.start()
+        ROUTINES[algorithm](grid, start, end, options)
+        record['peak_memory'] = tracemalloc.get_traced_memory()[1]  # bytes
+        tracemalloc.stop()
+    return record
+
+
+def runBenchmark(sizes, maps, densities, algorithms, seed=0, repeat=1, memory=True, log=None, options=None):
+    # runs every algorithm on every map, returns a list of result dicts (one per algorithm per map).
+    # options go to every search, any search that cant take them (JPS with 8 moves, say) gets skipped
+    results = []
+    for size in sizes:
+        for kind in maps:
+            for density in (densities if kind == 'random' else [None]):
+                grid, start, end = makeMap(kind, size, seed, density)
+                for algorithm in algorithms:
+                    record = {'map': kind, 'size': size, 'density': density, 'seed': seed,
+                              'walls': float(grid.mean()), 'moves': (options or {}).get('moves', 4)}
+                    try:
+                        record.update(runOne(algorithm, grid, start, end, repeat, memory, options))
+                    except ValueError as error:
+                        if log is not None:
+                            print(f"{kind:>6} {size:>5} {algorithm:>16}: skipped, {error}", file=log)
+                        continue
+                    results.append(record)
+                    if log is not None:
+                        print(f"{kind:>6} {size:>5} {algorithm:>16}: {record['time']:.4f}s, "
+                              f"{record['expanded']} expanded, path {record['path_length']}", file=log)
+    return results
+
+
+def runScenarios(paths, algorithms, repeat=1, memory=False, log=None, options=None, limit=None):
+    # runs every algorithm on every scenario in the given .scen files, returns a list of result dicts like
+    # runBenchmark, plus the scenarios bucket and optimal length and how far over that the search came ('excess')
+    results = []
+    maps = {}  # map file -> (walls, prepared), each map only gets loaded once
+    for path in paths:
+        for scenario in loadScenarios(path)[:limit]:
+            map_path = findMap(path, scenario['map'])
+            if map_path not in maps:
+                walls = loadMovingAI(map_path)
+                maps[map_path] = walls, prepareGrid(walls)
+            walls, prepared = maps[map_path]
+            if walls.shape != (scenario['height'], scenario['width']):
+                raise ValueError(map_path + " is " + str(walls.shape) + " but " + path + " says its "
+                                 + str((scenario['height'], scenario['width'])))
+            for algorithm in algorithms:
+                record = {'map': scenario['map'], 'bucket': scenario['bucket'], 'start': scenario['start'],
+                          'end': scenario['end'], 'optimal': scenario['optimal']}
+                try:
+                    record.update(runOne(algorithm, walls, scenario['start'], scenario['end'], repeat, memory,
+                                         dict(options or {}, prepared=prepared)))
+                except ValueError as error:
+                    if log is not None:
+                        print(f"{scenario['map']} {algorithm:>16}: skipped, {error}", file=log)
+                    continue
+                record['excess'] = record['cost'] - scenario['optimal'] if record['found'] else None
+                results.append(record)
+                if log is not None:
+                    print(f"{scenario['map']} {scenario['bucket']:>3} {algorithm:>16}: {record['time']:.4f}s, "
+                          f"{record['expanded']} expanded, cost {record['cost']} (optimal {scenario['optimal']})",
+                          file=log)
+    return results
+
+
+def writeResults(results, output, form):
+    if form == 'json':
+        json.dump(results, output, indent=2)
+        output.write('\n')
+    else:
+        writer = csv.DictWriter(output, fieldnames=list(results[0]) if results else [])
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the path finding searches on generated maps.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 100, 500, 1000],
+                        help='grid sizes to test (each map is size x size), up to 4096 or so')
+    parser.add_argument('--maps', nargs='+', choices=list(MAPS), default=list(MAPS), help='map types to test')
+    parser.add_argument('--densities', type=float, nargs='+', default=[0.1, 0.2, 0.3],
+                        help='wall densities for the random maps')
+    parser.add_argument('--algorithms', nargs='+', choices=list(ROUTINES), default=list(ROUTINES),
+                        help='searches to run (default all of them)')
+    parser.add_argument('--scen', nargs='+', help='MovingAI .scen files to run instead of the generated maps')
+    parser.add_argument('--limit', type=int, help='only run the first this many scenarios from each .scen file')
+    parser.add_argument('--moves', type=int, choices=[4, 8],
+                        help='4 or 8 (diagonal) moves, default 4 (or 8 for --scen, which the optimal lengths assume)')
+    parser.add_argument('--heuristic', choices=list(HEURISTICS),
+                        help='heuristic for the searches that use one (default manhattan, or octile with 8 moves)')
+    parser.add_argument('--tie-break', choices=list(TIE_BREAKS), default='h', help='how equal f values are ordered')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the map generators')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per search, the fastest one is reported')
+    parser.add_argument('--no-memory', action='store_true', help='skip the extra tracemalloc run for peak memory')
+    parser.add_argument('--format', choices=['json', 'csv'], default='json')
+    parser.add_argument('--output', help='file to write results to (default stdout)')
+    args = parser.parse_args(argv)
+
+    options = {'moves': args.moves or (8 if args.scen else 4), 'heuristic': args.heuristic, 'tie_break': args.tie_break}
+    if args.scen:
+        results = runScenarios(args.scen, args.algorithms, args.repeat, not args.no_memory, log=sys.stderr,
+                               options=options, limit=args.limit)
+    else:
+        results = runBenchmark(args.sizes, args.maps, args.densities, args.algorithms, args.seed, args.repeat,
+                               not args.no_memory, log=sys.stderr, options=options)
+    if args.output:
+        with open(args.output, 'w', newline='') as output:
+            writeResults(results, output, args.format)
+    else:
+        writeResults(results, sys.stdout, args.format)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+import heapq
+import time
+from SearchEngine import INF, checkUniform, newStats, prepareGrid, toIndex, toPosition, visitedMask
+
+# D* Lite incremental planner. unlike the searches in SearchEngine it keeps its search state between runs, so after
+# walls get added/removed or the start moves, plan() only redoes the part of the search those changes affect
+# instead of starting over. it searches backwards from the end, so g[cell] is the cost from cell to the end and moving
+# the start is cheap. moving the end means starting over (thats just what D* Lite does).
+#   planner = DStarLite(walls, start, end)
+#   path, stats = planner.plan()
+#   planner.setWall((3, 4), True)
+#   path, stats = planner.plan()    # repairs the old search
+
+
+class DStarLite:
+    def __init__(self, grid, start, end):
+        self.blocked, self.rows, self.cols, self.width = prepareGrid(grid)  # own copy, change it with setWall
+        self.moves = (-self.width, -1, self.width, 1)
+        self.expanded = self.generated = 0  # counts for the current plan() call
+        self.reopened = self.heuristic_calls = 0
+        self.touched = []                   # cells expanded in the current plan() call
+        self.reset(start, end)
+
+    def reset(self, start, end):
+        # throws away all search state and starts fresh with the given start/end
+        size = len(self.blocked)
+        self.start = toIndex(start, self.width)
+        self.goal = toIndex(end, self.width)
+        self.g = [INF] * size    # cost to the end as of the last time this cell was expanded
+        self.rhs = [INF] * size  # one step lookahead of g, a cell is "inconsistent" (queued) when they differ
+        self.key = [None] * size  # current queue key for each queued cell, None when its not queued
+        self.queue = []           # heap of (k1, k2, cell), entries whose key doesnt match self.key are stale
+        self.km = 0               # how far the start has moved, added to keys instead of re-keying the whole queue
+        self.rhs[self.goal] = 0
+        self.updateVertex(self.goal)
+
+    def heuristic(self, a, b):
+        self.heuristic_calls += 1
+        a_row, a_col = divmod(a, self.width)
+        b_row, b_col = divmod(b, self.width)
+        return abs(a_row - b_row) + abs(a_col - b_col)
+
+    def calculateKey(self, cell):
+        best = min(self.g[cell], self.rhs[cell])
+        return best + self.heuristic(self.start, cell) + self.km, best
+
+    def updateVertex(self, cell):
+        if self.g[cell] != self.rhs[cell]:
+            key = self.calculateKey(cell)
+            if self.key[cell] is not None:
+                self.reopened += 1  # already queued, the old entry goes stale
+            self.key[cell] = key
+            heapq.heappush(self.queue, (key[0], key[1], cell))
+            self.generated += 1
+        else:
+            self.key[cell] = None  # any entry left in the heap for it is now stale
+
+    def lookahead(self, cell):
+        # best cost to the end through any neighbour (the new rhs for cell)
+        if self.blocked[cell]:
+            return INF
+        g = self.g
+        best = INF
+        for move in self.moves:
+            child = cell + move
+            if not self.blocked[child] and g[child] + 1 < best:
+                best = g[child] + 1
+        return best
+
+    def computeShortestPath(self):
+        queue, key, g, rhs, blocked = self.queue, self.key, self.g, self.rhs, self.blocked
+        while True:
+            while queue and key[queue[0][2]] != (queue[0][0], queue[0][1]):
+                heapq.heappop(queue)  # lazy deletion
+            if not queue:
+                return
+            start_key = self.calculateKey(self.start)
+            if (queue[0][0], queue[0][1]) >= start_key and rhs[self.start] == g[self.start]:
+                return  # the start is consistent and nothing queued could change it
+
+            k1, k2, cell = heapq.heappop(queue)
+            new_key = self.calculateKey(cell)
+            if (k1, k2) < new_key:
+                key[cell] = new_key  # key went up since it was queued (start moved), requeue it
+                heapq.heappush(queue, (new_key[0], new_key[1], cell))
+                continue
+            key[cell] = None
+            self.expanded += 1
+            self.touched.append(cell)
+            if g[cell] > rhs[cell]:  # got cheaper, settle it and tell the neighbours
+                g[cell] = rhs[cell]
+                for move in self.moves:
+                    neighbour = cell + move
+                    if neighbour != self.goal and not blocked[neighbour] and g[cell] + 1 < rhs[neighbour]:
+                        rhs[neighbour] = g[cell] + 1
+                        self.updateVertex(neighbour)
+            else:  # got more expensive, so anything that was going through it has to look again
+                old_g = g[cell]
+                g[cell] = INF
+                for neighbour in [cell + move for move in self.moves] + [cell]:
+                    if neighbour != self.goal and not blocked[neighbour] \
+                            and (neighbour == cell or rhs[neighbour] == old_g + 1):
+                        rhs[neighbour] = self.lookahead(neighbour)
+                    self.updateVertex(neighbour)
+
+    def plan(self):
+        # brings the search up to date with any changes and returns (path, stats) like the other searches do,
+        # stats only count the work done by this call, and stats['visited'] is the cells this call expanded
+        t0 = time.perf_counter()
+        stats = newStats()
+        self.expanded = self.generated = self.reopened = self.heuristic_calls = 0
+        self.touched = []
+        path = []
+        if not self.blocked[self.start] and not self.blocked[self.goal]:
+            self.computeShortestPath()
+            if self.g[self.start] < INF:
+                current = self.start
+                path.append(current)
+                while current != self.goal:  # walk downhill on g to the end
+                    current = min((current + move for move in self.moves if not self.blocked[current + move]),
+                                  key=self.g.__getitem__)
+                    path.append(current)
+                stats['cost'] = self.g[self.start]
+        stats['expanded'] = self.expanded
+        stats['generated'] = self.generated
+        stats['peak_open'] = len(self.queue)
+        stats['reopened'] = self.reopened
+        stats['heuristic_calls'] = self.heuristic_calls
+        stats['path_length'] = max(len(path) - 1, 0)
+        closed = bytearray(len(self.blocked))
+        for cell in self.touched:
+            closed[cell] = 1
+        stats['visited'] = visitedMask(closed, self.rows, self.width)
+        stats['time'] = time.perf_counter() - t0
+        return [toPosition(cell, self.width) for cell in path], stats
+
+    def setWall(self, position, wall):
+        # adds (wall=True) or removes a wall, the next plan() repairs whatever it affected
+        cell = toIndex(position, self.width)
+        if bool(self.blocked[cell]) == bool(wall):
+            return
+        self.blocked[cell] = bool(wall)
+        for neighbour in [cell] + [cell + move for move in self.moves]:
+            if neighbour != self.goal:
+                self.rhs[neighbour] = self.lookahead(neighbour)
+            self.updateVertex(neighbour)
+
+    def moveStart(self, position):
+        # cheap, the search is rooted at the end so nothing has to be thrown away. the keys already queued were worked
+        # out from the old start, adding how far it moved to km keeps them lower bounds so they dont need redoing
+        start = toIndex(position, self.width)
+        self.km += self.heuristic(self.start, start)
+        self.start = start
+
+    def moveEnd(self, position):
+        self.reset(toPosition(self.start, self.width), position)
+
+
+def dStarLiteSearch(grid, start, end, options=None):
+    # one off D* Lite search with the same interface as the searches in SearchEngine (4 moves, no costs)
+    checkUniform(options, 'D* Lite')
+    return DStarLite(grid, start, end).plan()
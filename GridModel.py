@@ -0,0 +1,327 @@
+import numpy as np
+
+# the grid the window edits, kept as flat numpy layers instead of one array of mixed state codes:
+#   terrain  - uint8, 1 for a wall and 0 for open (so it can be handed straight to any search as its walls)
+#   costs    - uint8, the cost of stepping onto each cell, handed to the searches as options['costs']. None until
+#              some cell costs more than 1
+#   marks    - uint8, the visited, frontier and path overlays the searches draw on, packed together, see below
+# so a grid takes 2 bytes a cell (3 once theres mud). the start/end are just positions, not cells in any layer.
+# clearing all the overlays at once (what a new search does) is O(1): the top 5 bits of each cells marks are a stamp
+# and the low 3 bits say which overlays its on in, and those bits only count when the stamp matches the current one.
+# so clearing just moves the current stamp on (the array is only really zeroed when the stamp wraps around, once every
+# 31 clears). clearing one overlay on its own isnt, the stamp is shared so it has to take that overlays bit off cell
+# by cell (only in the rows anything was marked in, but thats the whole grid after a big search). a stamp for each
+# overlay would need more than the 5 bits left, and doubling the marks to 2 bytes a cell isnt worth it for something
+# the window never does.
+# the terrain and costs are copy on write, snapshot() and costSnapshot() hand out read only views and the next edit
+# copies them first, so a search can keep them as long as it likes.
+# for drawing grids with more cells than the screen has pixels, lod(factor) gives a shrunk copy of the grid (each of
+# its cells a factor x factor block of this one) that every edit and mark keeps up to date.
+# every change also notes which cells it made look different, so whatever draws the grid can ask takeDirty() for
+# just those instead of comparing the whole grid against what it drew last time. a few single cell edits are kept
+# cell by cell, anything bigger (search batches, clears, loads) as the TILE x TILE blocks it touched.
+#   grid = GridModel(100)
+#   grid.setWall(5, 7, True)
+#   path, stats = search('A*', grid.snapshot(), grid.start, grid.end)
+#   grid.mark('path', path)
+
+OPEN = 0
+WALL = 1
+START = 2      # state codes used by cells(), same numbers the window has always used for its colors
+END = 3
+PATH = 4
+VISITED = 5
+FRONTIER = 6
+MUD = 7        # open cell that costs more than 1 to step onto
+PARTIAL = 8    # only in lod() levels, a block with some walls in it but nothing else to show
+LAYERS = ('visited', 'frontier', 'path')
+BITS = {'visited': 1, 'frontier': 2, 'path': 4}  # which bit of a cells marks each overlay is
+STAMP_SHIFT = 3                                  # the stamp is the bits above those
+MAX_STAMP = 255 >> STAMP_SHIFT
+TILE = 16             # side of the blocks of cells changes get noted in for redrawing
+MAX_DIRTY_CELLS = 64  # past this many changed cells, only note the blocks they are in
+
+
+def pool(array, factor):
+    # max over each factor x factor block of a 2d array (blocks on the bottom/right edges can be smaller)
+    rows, cols = array.shape
+    pooled = np.maximum.reduceat(array, np.arange(0, rows, factor), axis=0)
+    return np.maximum.reduceat(pooled, np.arange(0, cols, factor), axis=1)
+
+
+class GridModel:
+    def __init__(self, rows, cols=None):
+        self.rows = rows
+        self.cols = rows if cols is None else cols
+        self.terrain = np.zeros((self.rows, self.cols), dtype=np.uint8)
+        self.costs = None    # made when a cell first costs more than 1
+        self.shared = set()  # 'terrain'/'costs' while a snapshot might still be looking at them
+        self.weighted = 0    # how many cells cost more than 1
+        self.marks = np.zeros((self.rows, self.cols), dtype=np.uint8)
+        self.stamp = 1
+        self.version = 0     # goes up on every change, so anything drawn from the grid knows when to redo it
+        self.codes = None    # cells() from the last time it was worked out, and the (version, region) it was for
+        self.codes_key = None
+        self.pooled = False  # True for the shrunk copies from lod()
+        self.solid = None    # for those, the blocks that are all wall
+        self.levels = {}     # factor -> shrunk copy, for each lod() asked for so far
+        tiles = (-(-self.rows // TILE), -(-self.cols // TILE))
+        self.dirty = np.zeros(tiles, dtype=bool)   # blocks that changed since the last takeDirty()
+        self.dirty_cells = []                      # the same changes cell by cell, None once there are too many
+        self.marked = np.zeros(tiles, dtype=bool)  # blocks with something on in an overlay, for clear() to redraw
+        self.start = (0, 0)
+        self.end = (self.rows - 1, self.cols - 1)
+
+    def reset(self):
+        # back to an empty grid with the start/end in the corners, without making new arrays unless a search has them
+        # (then it gets fresh ones and the search keeps the old ones)
+        if 'terrain' in self.shared:
+            self.terrain = np.zeros((self.rows, self.cols), dtype=np.uint8)
+        else:
+            self.terrain.fill(OPEN)
+        self.costs = None  # a search with a snapshot of them keeps its own
+        self.shared.clear()
+        self.weighted = 0
+        self.levels = {}  # rebuilt from the new grid when they get asked for again
+        self.clear()
+        self.start = (0, 0)
+        self.end = (self.rows - 1, self.cols - 1)
+        self.touchTiles(True)
+        self.version += 1
+
+    def load(self, walls, costs=None, start=None, end=None):
+        # puts a map (from MapFiles.readMap, say) in the top left of the grid, anything past its edges is wall.
+        # start/end default to its top left and bottom right corners, and never end up on a wall
+        rows, cols = np.shape(walls)
+        if rows > self.rows or cols > self.cols:
+            raise ValueError("a " + str((rows, cols)) + " map doesnt fit in a " + str((self.rows, self.cols)) + " grid")
+        self.reset()
+        terrain = self.writable()
+        terrain.fill(WALL)
+        terrain[:rows, :cols] = np.asarray(walls, dtype=bool)
+        if costs is not None:
+            self.writable('costs')[:rows, :cols] = costs
+            self.weighted = int((self.costs > 1).sum())
+        self.start = tuple(start) if start is not None else (0, 0)
+        self.end = tuple(end) if end is not None else (rows - 1, cols - 1)
+        terrain[self.start] = terrain[self.end] = OPEN
+        self.levels = {}
+        self.touchTiles(True)
+        self.version += 1
+
+    def writable(self, name='terrain'):
+        # the terrain (or costs), copied first if a snapshot is sharing it
+        if name == 'costs' and self.costs is None:
+            self.costs = np.ones((self.rows, self.cols), dtype=np.uint8)
+        if name in self.shared:
+            setattr(self, name, getattr(self, name).copy())
+            self.shared.discard(name)
+        return getattr(self, name)
+
+    def snapshot(self, name='terrain'):
+        # read only view of the walls (or costs) as they are now, later edits dont show up in it
+        self.shared.add(name)
+        view = getattr(self, name).view()
+        view.flags.writeable = False
+        return view
+
+    def costSnapshot(self):
+        # snapshot of the costs, or None when every cell costs 1 (so the searches can skip them)
+        return self.snapshot('costs') if self.weighted else None
+
+    def isWall(self, row, col):
+        return self.terrain[row, col] == WALL
+
+    def isEndpoint(self, row, col):
+        return (row, col) == self.start or (row, col) == self.end
+
+    def setWall(self, row, col, wall):
+        # adds or removes a wall, returns True if that changed anything (the start/end cant be walled over)
+        if self.isEndpoint(row, col) or self.isWall(row, col) == bool(wall):
+            return False
+        self.writable()[row, col] = WALL if wall else OPEN
+        self.poolCell('terrain', row, col)
+        self.touch(row, col)
+        self.version += 1
+        return True
+
+    def setCost(self, row, col, cost):
+        # sets what stepping onto a cell costs (1 to 255), returns True if that changed anything
+        old = int(self.costs[row, col]) if self.costs is not None else 1
+        if old == cost:
+            return False
+        self.weighted += (cost > 1) - (old > 1)
+        self.writable('costs')[row, col] = cost
+        self.poolCell('costs', row, col)
+        self.touch(row, col)
+        self.version += 1
+        return True
+
+    def moveStart(self, row, col):
+        # returns True if it moved, anything but the end is fine (a wall there gets taken away)
+        if (row, col) == self.end:
+            return False
+        if self.isWall(row, col):
+            self.writable()[row, col] = OPEN
+            self.poolCell('terrain', row, col)
+        self.touch(*self.start)
+        self.touch(row, col)
+        self.start = (row, col)
+        for factor, level in self.levels.items():
+            level.touch(*level.start)
+            level.start = (row // factor, col // factor)
+            level.touch(*level.start)
+            level.version += 1
+        self.version += 1
+        return True
+
+    def moveEnd(self, row, col):
+        if (row, col) == self.start:
+            return False
+        if self.isWall(row, col):
+            self.writable()[row, col] = OPEN
+            self.poolCell('terrain', row, col)
+        self.touch(*self.end)
+        self.touch(row, col)
+        self.end = (row, col)
+        for factor, level in self.levels.items():
+            level.touch(*level.end)
+            level.end = (row // factor, col // factor)
+            level.touch(*level.end)
+            level.version += 1
+        self.version += 1
+        return True
+
+    def mark(self, name, cells):
+        # turns cells on in an overlay, cells is a bool mask the size of the grid, a (k, 2) array of (row, col)
+        # or a list of (row, col) positions
+        cells = np.asarray(cells)
+        if cells.size == 0:
+            return
+        if cells.dtype == bool:
+            where = cells
+            for factor, level in self.levels.items():
+                level.mark(name, pool(cells, factor))
+            tiles = pool(cells, TILE)
+            self.touchTiles(tiles)
+            self.marked |= tiles
+        else:
+            cells = cells.reshape(-1, 2)
+            where = (cells[:, 0], cells[:, 1])
+            for factor, level in self.levels.items():
+                level.mark(name, cells // factor)
+            self.touch(*where)
+            self.marked[where[0] // TILE, where[1] // TILE] = True
+        marks = self.marks[where]
+        current = (marks >> STAMP_SHIFT) == self.stamp  # cells with an older stamp start again from nothing
+        self.marks[where] = np.where(current, marks, self.stamp << STAMP_SHIFT) | BITS[name]
+        self.version += 1
+
+    def layer(self, name, area=(slice(None), slice(None))):
+        # bool mask of the cells turned on in an overlay (in an area of the grid, the whole grid by default)
+        bit = BITS[name]
+        return (self.marks[area] & ((MAX_STAMP << STAMP_SHIFT) | bit)) == ((self.stamp << STAMP_SHIFT) | bit)
+
+    def clear(self, name=None):
+        # turns a whole overlay off (or all of them when no name is given)
+        for level in self.levels.values():
+            level.clear(name)
+        self.touchTiles(self.marked)  # only the blocks something was marked in look any different
+        if name is not None:  # just the one, that means going over the cells (see the top of the file)
+            rows = np.flatnonzero(self.marked.any(axis=1))
+            if rows.size:
+                self.marks[rows[0] * TILE:(rows[-1] + 1) * TILE] &= ~np.uint8(BITS[name])
+        else:
+            self.marked.fill(False)
+            if self.stamp == MAX_STAMP:  # out of stamps, so really zero them and start again
+                self.marks.fill(0)
+                self.stamp = 1
+            else:
+                self.stamp += 1
+        self.version += 1
+
+    def lod(self, factor):
+        # the grid shrunk by factor along each side, for drawing it zoomed out (level of detail). a cell of it is a
+        # wall if any cell in its block is, mud if any is, and on in an overlay if any is, and its cells() only draws
+        # blocks that are all wall as walls (see there). its made the first time its asked for, then kept up to date
+        # with every change until the next reset/load
+        if factor not in self.levels:
+            level = GridModel(-(-self.rows // factor), -(-self.cols // factor))
+            level.pooled = True
+            level.terrain = pool(self.terrain, factor)
+            level.solid = ~pool(self.terrain != WALL, factor)
+            if self.weighted:
+                level.costs = pool(self.costs, factor)
+                level.weighted = int((level.costs > 1).sum())
+            for name in LAYERS:
+                level.mark(name, pool(self.layer(name), factor))
+            level.start = (self.start[0] // factor, self.start[1] // factor)
+            level.end = (self.end[0] // factor, self.end[1] // factor)
+            self.levels[factor] = level
+        return self.levels[factor]
+
+    def poolCell(self, name, row, col):
+        # redoes the block (row, col) is in for every lod() level, after the terrain/costs there changed
+        for factor, level in self.levels.items():
+            top, left = row // factor, col // factor
+            block = getattr(self, name)[top * factor:(top + 1) * factor, left * factor:(left + 1) * factor]
+            if name == 'costs':
+                level.setCost(top, left, int(block.max()))
+            else:
+                level.terrain[top, left] = block.max()
+                level.solid[top, left] = block.min() == WALL
+                level.touch(top, left)
+                level.version += 1
+
+    def touch(self, rows, cols):
+        # notes that some cells (a row and col each, or arrays of them) look different now, see takeDirty()
+        self.dirty[rows // TILE, cols // TILE] = True
+        if self.dirty_cells is not None and len(self.dirty_cells) + np.size(rows) <= MAX_DIRTY_CELLS:
+            self.dirty_cells.extend(zip(np.ravel(rows).tolist(), np.ravel(cols).tolist()))
+        else:
+            self.dirty_cells = None
+
+    def touchTiles(self, tiles):
+        # same for whole blocks, tiles is a bool mask with one entry per block (or True for all of them)
+        self.dirty |= tiles
+        self.dirty_cells = None
+
+    def takeDirty(self, top=0, left=0, bottom=None, right=None):
+        # what changed since the last call, for the cells in rows top:bottom and cols left:right. returns a list of
+        # the (row, col) cells that changed, or None when there were too many to list, along with a bool mask of the
+        # changed blocks starting from block (top // TILE, left // TILE). forgets about everything, in the area or not
+        bottom = self.rows if bottom is None else bottom
+        right = self.cols if right is None else right
+        cells = self.dirty_cells
+        if cells is not None:
+            cells = [(row, col) for row, col in cells if top <= row < bottom and left <= col < right]
+        tiles = self.dirty[top // TILE:-(-bottom // TILE), left // TILE:-(-right // TILE)].copy()
+        self.dirty.fill(False)
+        self.dirty_cells = []
+        return cells, tiles
+
+    def cells(self, top=0, left=0, bottom=None, right=None):
+        # everything flattened into one uint8 state code per cell (OPEN, WALL, ... FRONTIER) for drawing, for the
+        # cells in rows top:bottom and cols left:right (the whole grid by default). only worked out again when
+        # something changed or a different region is asked for
+        bottom = self.rows if bottom is None else bottom
+        right = self.cols if right is None else right
+        if self.codes_key != (self.version, top, left, bottom, right):
+            area = (slice(top, bottom), slice(left, right))
+            codes = np.full((bottom - top, right - left), OPEN, dtype=np.uint8)
+            if self.weighted:
+                codes[self.costs[area] > 1] = MUD
+            for name, code in (('frontier', FRONTIER), ('visited', VISITED), ('path', PATH)):
+                codes[self.layer(name, area)] = code
+            walls = self.terrain[area] == WALL
+            if self.pooled:  # a block thats only partly wall shows whatever else is in it, so thin walls dont hide
+                codes[walls & (codes == OPEN)] = PARTIAL  # mazes or searches when zoomed out
+                codes[self.solid[area] & (codes != PATH)] = WALL
+            else:
+                codes[walls] = WALL  # a wall drawn over an old search hides it
+            for (row, col), code in ((self.start, START), (self.end, END)):
+                if top <= row < bottom and left <= col < right:
+                    codes[row - top, col - left] = code
+            self.codes = codes
+            self.codes_key = (self.version, top, left, bottom, right)
+        return self.codes
@@ -0,0 +1,244 @@
+import heapq
+import time
+import numpy as np
+from SearchEngine import INF, checkUniform, newStats, prepareGrid, toIndex, toPosition, visitedMask
+
+# HPA* (hierarchical path finding A*) for very big grids. the grid is cut into square clusters, and where two
+# clusters touch, each opening in the wall between them gets one or two entrances. the entrances and the distances
+# between entrances of the same cluster make a small abstract graph, which is searched instead of the grid, and only
+# the steps of the abstract path are then refined back into cells. clusters are built the first time the search
+# reaches them, and a wall edit only throws away the clusters it touched, so they get rebuilt on the next plan().
+# the path is close to the shortest but not always exactly it (it has to go through entrances).
+#   planner = HPAStar(walls, start, end)
+#   path, stats = planner.plan()
+#   planner.setWall((3, 4), True)
+#   path, stats = planner.plan()    # rebuilds the cluster (3, 4) is in, the rest is reused
+
+CLUSTER_SIZE = 16     # cells along each side of a cluster
+ENTRANCE_SPLIT = 6    # openings at least this long get an entrance at both ends instead of one in the middle
+
+
+class HPAStar:
+    def __init__(self, grid, start, end, cluster_size=CLUSTER_SIZE):
+        self.blocked, self.rows, self.cols, self.width = prepareGrid(grid)  # own copy, change it with setWall
+        self.moves = (-self.width, -1, self.width, 1)
+        self.size = cluster_size
+        self.cluster_rows = -(-self.rows // cluster_size)  # rounded up, edge clusters can be smaller
+        self.cluster_cols = -(-self.cols // cluster_size)
+        ids = (np.arange(self.rows) // cluster_size)[:, None] * self.cluster_cols + np.arange(self.cols) // cluster_size
+        self.owner = np.pad(ids, 1, mode='constant', constant_values=-1).ravel().tolist()  # cluster of each cell
+        self.borders = {}   # (cluster, cluster to its right/below) -> [(cell, cell across), ...] for each entrance
+        self.nodes = {}     # cluster -> {entrance: [(neighbour, cost), ...]}, only for clusters built so far
+        self.segments = {}  # cluster -> {(cell, cell): refined path}, filled in as paths get refined
+        self.start = toIndex(start, self.width)
+        self.goal = toIndex(end, self.width)
+        self.expanded = self.built = 0  # counts for the current plan() call
+        self.touched = []               # cells looked at in the current plan() call
+
+    def bounds(self, cluster):
+        # (top, left, bottom, right) of a cluster, inclusive
+        row, col = divmod(cluster, self.cluster_cols)
+        top, left = row * self.size, col * self.size
+        return top, left, min(top + self.size, self.rows) - 1, min(left + self.size, self.cols) - 1
+
+    def clusterBorders(self, cluster):
+        # (key into self.borders, side) for every neighbouring cluster
+        row, col = divmod(cluster, self.cluster_cols)
+        sides = []
+        if col > 0:
+            sides.append(((cluster - 1, cluster), 'left'))
+        if row > 0:
+            sides.append(((cluster - self.cluster_cols, cluster), 'top'))
+        if col < self.cluster_cols - 1:
+            sides.append(((cluster, cluster + 1), 'right'))
+        if row < self.cluster_rows - 1:
+            sides.append(((cluster, cluster + self.cluster_cols), 'bottom'))
+        return sides
+
+    def border(self, key):
+        # entrances between two clusters, worked out from the open runs along the edge they share
+        if key not in self.borders:
+            cluster, neighbour = key
+            top, left, bottom, right = self.bounds(cluster)
+            if neighbour == cluster + 1 and neighbour % self.cluster_cols:  # to the right, walk down the edge
+                first, step, across, length = toIndex((top, right), self.width), self.width, 1, bottom - top + 1
+            else:  # below, walk along the edge
+                first, step, across, length = toIndex((bottom, left), self.width), 1, self.width, right - left + 1
+            blocked = self.blocked
+            pairs = []
+            run = []
+            for i in range(length + 1):
+                cell = first + i * step
+                if i < length and not blocked[cell] and not blocked[cell + across]:
+                    run.append(cell)
+                    continue
+                if run:  # end of an opening
+                    picks = [run[len(run) // 2]] if len(run) < ENTRANCE_SPLIT else [run[0], run[-1]]
+                    pairs.extend((pick, pick + across) for pick in picks)
+                    run = []
+            self.borders[key] = pairs
+        return self.borders[key]
+
+    def cluster(self, cluster):
+        # the clusters part of the abstract graph, built the first time its needed
+        if cluster not in self.nodes:
+            edges = {}
+            for key, side in self.clusterBorders(cluster):
+                for pair in self.border(key):
+                    inside, outside = pair if key[0] == cluster else pair[::-1]
+                    edges.setdefault(inside, []).append((outside, 1))  # stepping over into the next cluster
+            for entrance in list(edges):
+                distances = self.clusterSearch(entrance, cluster)[0]
+                for other in edges:
+                    if other != entrance and other in distances:
+                        edges[entrance].append((other, distances[other]))
+            self.nodes[cluster] = edges
+            self.built += 1
+        return self.nodes[cluster]
+
+    def clusterSearch(self, source, cluster, target=None):
+        # BFS that stays inside one cluster, returns (distance, parent) dicts. stops early once target is reached
+        blocked, owner, moves = self.blocked, self.owner, self.moves
+        parent = {source: source}
+        distance = {source: 0}
+        frontier = [source]
+        steps = 0
+        while frontier and target not in parent:
+            steps += 1
+            next_frontier = []
+            for current in frontier:
+                for move in moves:
+                    child = current + move
+                    if child not in parent and owner[child] == cluster and not blocked[child]:
+                        parent[child] = current
+                        distance[child] = steps
+                        next_frontier.append(child)
+            self.expanded += len(frontier)
+            frontier = next_frontier
+        self.touched.extend(parent)
+        return distance, parent
+
+    def heuristic(self, a, b):
+        a_row, a_col = divmod(a, self.width)
+        b_row, b_col = divmod(b, self.width)
+        return abs(a_row - b_row) + abs(a_col - b_col)
+
+    def abstractSearch(self, stats):
+        # A* over the entrances, with the start and end joined on to the entrances of their clusters.
+        # returns the list of nodes the path goes through (start and end included), or [] if there isnt one
+        start, goal, owner = self.start, self.goal, self.owner
+        start_cluster, goal_cluster = owner[start], owner[goal]
+        from_start = self.clusterSearch(start, start_cluster)[0]
+        to_goal = self.clusterSearch(goal, goal_cluster)[0]  # distances go both ways so this is also to the goal
+        cost = {start: 0}
+        parent = {start: start}
+        queue = [(self.heuristic(start, goal), 0, start)]  # (f, -g, node), on ties the node further along goes first
+        stats['heuristic_calls'] += 1
+        closed = set()
+        while queue:
+            f, g, node = heapq.heappop(queue)
+            g = -g
+            if node in closed:
+                continue  # stale entry, lazy deletion
+            if node == goal:
+                stats['cost'] = g
+                nodes = [goal]
+                while node != start:
+                    node = parent[node]
+                    nodes.append(node)
+                return nodes[::-1]
+            closed.add(node)
+            stats['expanded'] += 1
+            edges = list(self.cluster(owner[node]).get(node, ()))
+            if node == start:
+                edges.extend((entrance, from_start[entrance]) for entrance in self.cluster(start_cluster)
+                             if entrance in from_start)
+            if owner[node] == goal_cluster and node in to_goal:
+                edges.append((goal, to_goal[node]))
+            for neighbour, step in edges:
+                new_cost = g + step
+                if new_cost < cost.get(neighbour, INF):
+                    if neighbour in cost:
+                        stats['reopened'] += 1
+                    cost[neighbour] = new_cost
+                    parent[neighbour] = node
+                    heapq.heappush(queue, (new_cost + self.heuristic(neighbour, goal), -new_cost, neighbour))
+                    stats['generated'] += 1
+                    stats['heuristic_calls'] += 1
+            if len(queue) > stats['peak_open']:
+                stats['peak_open'] = len(queue)
+        return []
+
+    def refine(self, nodes):
+        # turns the abstract path back into cells, one step at a time. steps inside a cluster are searched for
+        # (only inside that cluster) and kept until the cluster changes, steps between clusters are just one move
+        path = [nodes[0]]
+        for a, b in zip(nodes, nodes[1:]):
+            cluster = self.owner[a]
+            if self.owner[b] != cluster:
+                path.append(b)
+                continue
+            segments = self.segments.setdefault(cluster, {})
+            if (a, b) not in segments:
+                parent = self.clusterSearch(a, cluster, b)[1]
+                segment = [b]
+                while segment[-1] != a:
+                    segment.append(parent[segment[-1]])
+                segments[(a, b)] = segment[-2::-1]  # a -> b without a
+            path.extend(segments[(a, b)])
+        return path
+
+    def plan(self):
+        # brings the abstract graph up to date with any changes and returns (path, stats) like the other searches do.
+        # stats['expanded'] is abstract nodes plus the cells looked at by this call, stats['visited'] those cells
+        t0 = time.perf_counter()
+        stats = newStats()
+        self.expanded = self.built = 0
+        self.touched = []
+        path = []
+        if not self.blocked[self.start] and not self.blocked[self.goal]:
+            nodes = self.abstractSearch(stats)
+            if nodes:
+                path = self.refine(nodes)
+        stats['abstract_expanded'] = stats['expanded']
+        stats['expanded'] += self.expanded
+        stats['clusters_built'] = self.built
+        stats['path_length'] = max(len(path) - 1, 0)
+        closed = bytearray(len(self.blocked))
+        for cell in self.touched:
+            closed[cell] = 1
+        stats['visited'] = visitedMask(closed, self.rows, self.width)
+        stats['time'] = time.perf_counter() - t0
+        return [toPosition(cell, self.width) for cell in path], stats
+
+    def setWall(self, position, wall):
+        # adds (wall=True) or removes a wall. its cluster gets rebuilt on the next plan(), along with the cluster
+        # across the edge if the cell is on one (the entrances between them might have changed)
+        cell = toIndex(position, self.width)
+        if bool(self.blocked[cell]) == bool(wall):
+            return
+        self.blocked[cell] = bool(wall)
+        cluster = self.owner[cell]
+        row, col = position
+        top, left, bottom, right = self.bounds(cluster)
+        on_edge = {'left': col == left, 'top': row == top, 'right': col == right, 'bottom': row == bottom}
+        dirty = [cluster]
+        for key, side in self.clusterBorders(cluster):
+            if on_edge[side]:
+                self.borders.pop(key, None)
+                dirty.append(key[0] if key[1] == cluster else key[1])
+        for cluster in dirty:
+            self.nodes.pop(cluster, None)
+            self.segments.pop(cluster, None)
+
+    def moveStart(self, position):
+        self.start = toIndex(position, self.width)  # the start is joined on fresh every plan(), nothing to redo
+
+    def moveEnd(self, position):
+        self.goal = toIndex(position, self.width)
+
+
+def hpaStarSearch(grid, start, end, options=None):
+    # one off HPA* search with the same interface as the searches in SearchEngine (4 moves, no costs)
+    checkUniform(options, 'HPA*')
+    return HPAStar(grid, start, end, (options or {}).get('cluster_size', CLUSTER_SIZE)).plan()
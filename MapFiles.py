@@ -0,0 +1,163 @@
+import os
+import struct
+import numpy as np
+
+# loading and saving maps, no pygame in here either. two formats:
+#  - our own binary .grid files: a 32 byte header (with the start/end) then the walls packed 8 cells to a byte, a row
+#    at a time, then optionally a byte per cell of costs. loadGrid memory maps the file, so even huge maps open
+#    straight away and only the parts that get looked at are ever read off disk
+#  - the MovingAI benchmark formats, .map grids and .scen lists of start/end pairs with their optimal path lengths
+#    (https://movingai.com/benchmarks/formats.html), so published benchmark sets can be run headless, e.g.
+#   saveGrid('maze.grid', walls, (0, 0), (99, 99))
+#   grid = loadGrid('maze.grid')
+#   path, stats = search('A*', grid.walls(), grid.start, grid.end)
+
+MAGIC = b'VPFG'
+VERSION = 1
+HAS_COSTS = 1                               # header flag, the file has a costs layer after the walls
+HEADER = struct.Struct('<4sHHIIIIII')       # magic, version, flags, rows, cols, start row, start col, end row, end col
+CHUNK_ROWS = 4096                           # rows packed/written at a time when saving, so big maps dont need 2 copies
+PASSABLE = b'.GS'                           # MovingAI ground, ground and swamp, everything else (@ O T W) is a wall
+
+
+class PackedGrid:
+    # a map opened with loadGrid. the walls stay bit packed (memory mapped if it was opened that way) until some
+    # part of them is asked for, so opening costs the same however big the map is
+    def __init__(self, packed, rows, cols, start, end, costs=None):
+        self.packed = packed  # (rows, bytes per row) uint8, 8 cells to a byte with the first cell in the top bit
+        self.rows = rows
+        self.cols = cols
+        self.start = start
+        self.end = end
+        self.costs = costs    # (rows, cols) uint8 or None
+
+    @property
+    def shape(self):
+        return self.rows, self.cols
+
+    def walls(self, top=0, left=0, bottom=None, right=None):
+        # bool array of the walls in rows top:bottom and cols left:right (the whole map by default)
+        bottom = self.rows if bottom is None else bottom
+        right = self.cols if right is None else right
+        first = left // 8
+        bits = np.unpackbits(self.packed[top:bottom, first:-(-right // 8)], axis=1)  # only the bytes covering it
+        return bits[:, left - first * 8:right - first * 8].view(bool)
+
+    def costRegion(self, top=0, left=0, bottom=None, right=None):
+        # costs in the same region, or None if the map doesnt have any
+        if self.costs is None:
+            return None
+        return np.asarray(self.costs[top:bottom, left:right])
+
+
+def saveGrid(path, walls, start, end, costs=None):
+    # writes a .grid file, walls is anything numpy can turn into a bool array, costs an optional uint8 array
+    walls = np.asarray(walls)
+    rows, cols = walls.shape
+    if costs is not None:
+        costs = np.asarray(costs)
+        if costs.shape != walls.shape:
+            raise ValueError("costs should be the same shape as the walls, " + str(walls.shape) + " not " + str(costs.shape))
+        if costs.min() < 1 or costs.max() > 255:
+            raise ValueError("costs should be from 1 to 255 to fit in a byte")
+    with open(path, 'wb') as output:
+        output.write(HEADER.pack(MAGIC, VERSION, HAS_COSTS if costs is not None else 0, rows, cols,
+                                 start[0], start[1], end[0], end[1]))
+        for top in range(0, rows, CHUNK_ROWS):
+            output.write(np.packbits(walls[top:top + CHUNK_ROWS].astype(bool), axis=1).tobytes())
+        if costs is not None:
+            for top in range(0, rows, CHUNK_ROWS):
+                output.write(costs[top:top + CHUNK_ROWS].astype(np.uint8).tobytes())
+
+
+def loadGrid(path, mmap=True):
+    # opens a .grid file as a PackedGrid. with mmap the arrays are views of the file on disk (read only),
+    # without it they get read into memory
+    with open(path, 'rb') as source:
+        header = source.read(HEADER.size)
+    if len(header) < HEADER.size or header[:4] != MAGIC:
+        raise ValueError(path + " isnt a .grid file")
+    magic, version, flags, rows, cols, start_row, start_col, end_row, end_col = HEADER.unpack(header)
+    if version != VERSION:
+        raise ValueError(path + " is a version " + str(version) + " .grid file, only version " + str(VERSION) + " can be read")
+    row_bytes = -(-cols // 8)
+    costs_offset = HEADER.size + rows * row_bytes
+    if os.path.getsize(path) < costs_offset + (rows * cols if flags & HAS_COSTS else 0):
+        raise ValueError(path + " is cut short")
+
+    def layer(offset, shape):
+        if mmap:
+            return np.memmap(path, dtype=np.uint8, mode='r', offset=offset, shape=shape)
+        return np.fromfile(path, dtype=np.uint8, count=shape[0] * shape[1], offset=offset).reshape(shape)
+
+    packed = layer(HEADER.size, (rows, row_bytes))
+    costs = layer(costs_offset, (rows, cols)) if flags & HAS_COSTS else None
+    return PackedGrid(packed, rows, cols, (start_row, start_col), (end_row, end_col), costs)
+
+
+def loadMovingAI(path):
+    # reads a MovingAI .map file into a bool array (True = wall)
+    with open(path, 'rb') as source:
+        data = source.read()
+    header, found, body = data.partition(b'\nmap')
+    if not found:
+        raise ValueError(path + " isnt a MovingAI map (no 'map' line)")
+    fields = dict(line.split(None, 1) for line in header.decode().splitlines() if line.strip())
+    rows, cols = int(fields['height']), int(fields['width'])
+    lines = body.split()[:rows]  # split() also gets rid of any \r\n line endings
+    if len(lines) < rows or any(len(line) != cols for line in lines):
+        raise ValueError(path + " doesnt have " + str(rows) + " rows of " + str(cols) + " cells")
+    cells = np.frombuffer(b''.join(lines), dtype=np.uint8).reshape(rows, cols)
+    return ~np.isin(cells, np.frombuffer(PASSABLE, dtype=np.uint8))
+
+
+def saveMovingAI(path, walls):
+    # writes a bool array as a MovingAI .map file ('.' open, '@' wall)
+    walls = np.asarray(walls, dtype=bool)
+    rows, cols = walls.shape
+    cells = np.where(walls, ord('@'), ord('.')).astype(np.uint8)
+    with open(path, 'wb') as output:
+        output.write(('type octile\nheight ' + str(rows) + '\nwidth ' + str(cols) + '\nmap\n').encode())
+        for top in range(0, rows, CHUNK_ROWS):
+            chunk = cells[top:top + CHUNK_ROWS]
+            lines = np.concatenate((chunk, np.full((len(chunk), 1), ord('\n'), dtype=np.uint8)), axis=1)
+            output.write(lines.tobytes())
+
+
+def loadScenarios(path):
+    # reads a MovingAI .scen file, returns a list of dicts with the map file, its size, the start/end as (row, col)
+    # and the optimal path length (for 8 moves without cutting corners)
+    scenarios = []
+    with open(path) as source:
+        for line in source:
+            if not line.strip() or line.startswith('version'):
+                continue
+            fields = line.rstrip('\r\n').split('\t') if '\t' in line else line.split()
+            bucket, map_name, width, height, start_x, start_y, end_x, end_y, optimal = fields[:9]
+            scenarios.append({'bucket': int(bucket),
+                              'map': map_name,
+                              'width': int(width),
+                              'height': int(height),
+                              'start': (int(start_y), int(start_x)),  # MovingAI goes (x, y), we go (row, col)
+                              'end': (int(end_y), int(end_x)),
+                              'optimal': float(optimal)})
+    return scenarios
+
+
+def findMap(scen_path, map_name):
+    # where the map a scenario names is, scenarios usually give a path relative to some benchmark folder so this tries
+    # it as it is, next to the .scen file, and just the file name next to the .scen file
+    folder = os.path.dirname(scen_path)
+    for candidate in (map_name, os.path.join(folder, map_name), os.path.join(folder, os.path.basename(map_name))):
+        if os.path.exists(candidate):
+            return candidate
+    raise FileNotFoundError("couldnt find " + map_name + " for " + scen_path)
+
+
+def readMap(path):
+    # any map file -> (walls, costs, start, end) as plain arrays, costs is None if it doesnt have any and start/end
+    # are None for MovingAI maps (they dont say)
+    if path.lower().endswith('.map'):
+        return loadMovingAI(path), None, None, None
+    grid = loadGrid(path, mmap=False)
+    return grid.walls(), grid.costRegion(), grid.start, grid.end
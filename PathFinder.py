@@ -1,122 +1,28 @@
+import cProfile
+import json
+import pstats
 import pygame
 import sys
 import numpy as np
 import time
-
-# **TODO: add fun stats to menu screen, add dropdown select for algorithm choice, then add more algorithms, possibly optimize run window function?
+from SearchEngine import ALGORITHMS, HEURISTICS, STEPS, TIE_BREAKS, checkUniform
+from SearchExecutor import SearchExecutor
+from BatchSearch import BatchSearch
+from DStarLite import DStarLite
+from HPAStar import HPAStar
+from GridModel import TILE, GridModel
+from MapFiles import readMap, saveGrid
 
 # search algorithim program by Ariel Leston.
-# "left click" to add walls, "right click" to remove walls
+# "left click" to add walls, "right click" to remove walls (and mud), "middle click" to add mud (costs more to cross)
 # "1" to move starting position, "2" to move end position, "enter" to search, "space" to reset
-
-
-class Node:
-    def __init__(self, parent=None, position=None):     # defining node class, each node will correspond to a coordinate
-        self.parent = parent                            # the path will be a linked chain of nodes
-        self.position = position
-        self.g = 0                                      # g is used for tracking total cost of path
-        self.h = 0                                      # h is used for distance metric of current node to end node
-        self.f = 0                                      # f is g + h, lowest f score will be best path
-
-    def __eq__(self, other):
-        return self.position == other.position          # allowing nodes to be checked for equality based on coordinates
-
-
-def returnPath(current_node):
-    # gets called by search, after finding path from start to end
-    # current_node should be end point, with its parent line being the path back to start point
-    path = []  # create empty list for path
-    current = current_node  # start iterating through given node parent line
-    while current is not None:  # for each node: add it to path list, then move to its parent node and repeat
-        path.append(current.position)
-        current = current.parent
-    path = path[::-1]  # reverses path list as it was created backwards
-    return path  # send back resulting path through maze
-
-
-def AStarSearch(win, block_size, grid, start, end):
-    # creates linked chain of nodes where root is start, and final child is end.
-    start_node = Node(None, tuple(start))  # establish starting location
-    end_node = Node(None, tuple(end))  # establish ending location
-    to_visit = []  # create two lists to keep track of whats visited vs unvisited
-    visited = []
-    to_visit.append(start_node)  # add start node to to_visit list (unvisited)
-    outer_iterations = 0
-    max_iterations = (len(grid) // 2) ** 5  # establish max iterations for the search, based on size of maze
-
-    move = [[-1, 0],  # establish the 4 possible moves: down, left, up, right
-            [0, -1],
-            [1, 0],
-            [0, 1]]
-
-    num_rows, num_columns = np.shape(grid)  # get dimensions of the given maze (length by width)
-
-    while len(to_visit) > 0:  # start searching
-        outer_iterations += 1  # start keeping count of search loops
-        current_node = to_visit[0]  # start checking node by node
-        current_index = 0
-        for index, item in enumerate(to_visit):  # for each node by index in the unvisited list:
-            if item.f < current_node.f:  # if another node has a lower f-score, move to that node
-                current_node = item
-                current_index = index
-
-        if outer_iterations > max_iterations:  # if search loop count exceeds limit, say it cant be found
-            print("Too many iterations done, cant find path")
-            return returnPath(current_node)
-
-        to_visit.pop(current_index)  # remove current node from unvisited and add it to visited list
-        visited.append(current_node)
-
-        if current_node == end_node:  # if current node is equal to end node then search is done
-            return returnPath(current_node)  # sends path to return_path so it can be processed and output
-
-        children = []  # create list for children nodes to be placed into, the steps in path
-
-        for new_position in move:  # try each of the 4 possible moves:
-            node_position = (current_node.position[0] + new_position[0],
-                             current_node.position[1] + new_position[1])  # new_position is step, for step in moves...
-
-            if (node_position[0] > (num_rows - 1)  # if it would result in an "out of bounds" position, skip it
-                    or node_position[1] > (num_columns - 1)
-                    or node_position[0] < 0
-                    or node_position[1] < 0):
-                continue
-
-            if grid[node_position[0]][node_position[1]] == 1 or grid[node_position[0]][node_position[1]] == 5:
-                continue  # if that position is a 1 or 5, skip it, means its a wall(1) or already checked(5)
-            # removing 5 as a restriction will allow it to reconsider paths, but it will be much slower.
-
-            new_node = Node(current_node, node_position)  # otherwise, pick that position as a new node (to check)
-            children.append(new_node)  # and add it to the list of children
-            for child in children:  # loop through each child in children list (looking for best next step)
-                if len([visited_child for visited_child in visited if visited_child == child]) > 0:
-                    continue  # skip if it would cause backtracking
-
-                child.g = current_node.g + 1  # g keeps track of cost to traverse path (how many steps)
-
-                # h used as a "distance to end" metric, calculated with euclidean function
-                # child.h = (((child.position[0] - end_node.position[0]) ** 2) ** 1/2 + ((child.position[1] - end_node.position[1]) ** 2) ** 1/2)
-                # this is essentially the educated guess of how to find its target, a more complex heuristic can be used
-                # but with euclidean function its just going to try and move in the general direction of the endpoint
-
-                # h using taxi-cab metric instead
-                child.h = abs(child.position[0] - end_node.position[0]) + abs(child.position[1] - end_node.position[1])
-
-                child.f = child.g + child.h  # f is g + h, best path will have the lowest f-value
-
-                if len([i for i in to_visit if child == i and child.f > i.f]) > 0:
-                    continue  # skip child if its unvisited AND has a higher f-cost than another unvisited choice
-                to_visit.append(child)  # otherwise, add that child to the unvisited list and re-loop (move there next)
-
-                # ---below only for visual part---
-                cpos = str(child.position[0]) + str(child.position[1])
-                epos = str(end[0]) + str(end[1])
-                if cpos != epos:  # to prevent endpoint from being recolored yellow
-                    grid[child.position[0]][child.position[1]] = 5  # changing considered path to yellow
-
-                win.drawGrid(block_size, grid)  # redraw screen to see path search in realtime
-
-        pygame.event.pump()  # prevent pygame timeouts as its loading
+# the box at the top of the menu picks which search algorithm gets run, the speed button changes how fast its shown
+# "escape" (or the run button, which turns into cancel) stops a search thats still going
+# "d" turns diagonal moves on/off, "h" picks the next heuristic, "t" picks the next way of breaking ties
+# "s" saves the grid to a .grid file, run it as "python PathFinder.py some.grid" (or a MovingAI .map) to start from one
+# the menu shows the counters from the last search, "e" exports every searches counters so far to a .json file,
+# "p" turns profiling on/off (searches then run straight away under cProfile and print where the time went)
+# the mouse wheel zooms in/out on the grid, the arrow keys move around it, "f" fits the whole grid back on screen
 
 
 BLACK = (0, 0, 0)
@@ -125,20 +31,206 @@ GREEN = (0, 255, 0)
 RED = (255, 0, 0)
 BLUE = (0, 0, 255)
 YELLOW = (255, 255, 0)
+PALE_YELLOW = (255, 255, 170)
+BROWN = (150, 100, 50)
 GRAY = (125, 125, 125)
-
-
-class Box:
-    def __init__(self, x, y, block_size, state):
-        self.position = (x, y)
-        self.size = block_size
-        self.state = state
-        self.colors = [WHITE, BLACK, GREEN, RED, BLUE, YELLOW]
-        self.color = self.colors[self.state]  # this makes state number correlate to color, 0 = white, 5 = yellow, ect
-
-    def draw(self, win):
-        pygame.draw.rect(win, self.color, (self.position[0], self.position[1], self.size, self.size))
-        pygame.draw.rect(win, BLACK, (self.position[0], self.position[1], self.size, self.size), 1)
+DARK_GRAY = (70, 70, 70)
+
+
+CELL_COLORS = [WHITE, BLACK, GREEN, RED, BLUE, YELLOW, PALE_YELLOW, BROWN, DARK_GRAY]  # GridModel state code -> color, 0 = white, 5 = yellow, ect
+COLORS = np.array(CELL_COLORS, dtype=np.uint8)          # same thing as an array, for coloring whole grids at once
+
+# search speeds for the speed button: how many nodes get expanded per frame, None means run it in the background
+# (on a worker thread) as fast as it can go, and just show whatever progress it has made each frame
+SPEEDS = {'Instant': None,
+          'Fast': 100,
+          'Medium': 10,
+          'Real-time': 1}
+SEARCH_TIMEOUT = 120    # seconds before a background search gets given up on
+
+# planners keep their search around after running, so when walls get edited or the start/end moves they just
+# repair the old search (and the path on screen updates straight away) instead of needing another run.
+# HPA* plans over clusters of cells, which is much less work on big grids, but its path isnt always the shortest
+PLANNERS = {'D* Lite': DStarLite,
+            'HPA*': HPAStar}
+UNIFORM_ONLY = {'JPS'} | set(PLANNERS)  # these only work with 4 moves and no mud
+
+MUD_COST = 5  # what stepping onto a mud cell costs (normal cells cost 1)
+
+# counters kept for each search (from its stats), shown in the menu and exported with "e"
+COUNTERS = ('expanded', 'generated', 'peak_open', 'reopened', 'heuristic_calls', 'path_length', 'cost',
+            'time', 'setup_time')
+STATS_PATH = 'stats.json'  # where "e" exports to
+PROFILE_LINES = 15         # functions printed for a profiled search
+
+# zoom levels the mouse wheel goes through, in pixels per cell. under 1 the grid is drawn from GridModel.lod(),
+# one pixel per block of cells, so a grid much bigger than the screen still only draws as many cells as fit on it
+ZOOMS = (1 / 64, 1 / 32, 1 / 16, 1 / 8, 1 / 4, 1 / 2, 1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 48, 64)
+PAN_KEYS = {pygame.K_UP: (-0.25, 0),     # arrow key -> (rows, cols) to move the view by, in screens
+            pygame.K_DOWN: (0.25, 0),
+            pygame.K_LEFT: (0, -0.25),
+            pygame.K_RIGHT: (0, 0.25)}
+
+
+class Viewport:
+    # the part of the grid thats on screen: the cell in the top left corner and the zoom (pixels per cell),
+    # for working out which cells to draw and which cell the mouse is over
+    def __init__(self, rows, cols, width, height):
+        self.rows = rows
+        self.cols = cols
+        self.width = width    # size of the screen its drawn on, in pixels
+        self.height = height
+        self.fit()
+
+    def fit(self):
+        # biggest zoom that shows the whole grid (whole pixels per cell, or a power of 2 cells per pixel past that)
+        self.zoom = min(self.width // self.cols, self.height // self.rows)
+        if self.zoom < 1:
+            self.zoom = next((zoom for zoom in reversed(ZOOMS) if zoom * self.cols <= self.width and zoom * self.rows <= self.height),
+                             ZOOMS[0])
+        self.min_zoom = self.zoom  # no point zooming out past the whole grid
+        self.top = self.left = 0
+
+    @property
+    def factor(self):
+        return max(1, round(1 / self.zoom))  # cells per pixel along each side, 1 when zoomed in
+
+    @property
+    def block(self):
+        return max(1, int(self.zoom))  # pixels per cell along each side, 1 when zoomed out
+
+    def resize(self, width, height):
+        fitted = self.zoom == self.min_zoom
+        self.width = width
+        self.height = height
+        if fitted:
+            self.fit()  # keep showing the whole grid at the new size
+        else:
+            self.min_zoom = min(self.min_zoom, self.zoom)
+            self.clamp()
+
+    def span(self):
+        # (rows, cols) of cells that fit on the screen
+        return int(self.height / self.zoom), int(self.width / self.zoom)
+
+    def clamp(self):
+        # keeps the view over the grid, and lined up with the lod() blocks when zoomed out
+        rows, cols = self.span()
+        self.top = max(0, min(self.top, self.rows - rows)) // self.factor * self.factor
+        self.left = max(0, min(self.left, self.cols - cols)) // self.factor * self.factor
+
+    def visible(self):
+        # (top, left, bottom, right) of the cells on screen (counting ones cut off at the edge), bottom/right not included
+        rows, cols = self.span()
+        return self.top, self.left, min(self.top + rows + 1, self.rows), min(self.left + cols + 1, self.cols)
+
+    def toCell(self, x, y):
+        # the (row, col) at a position on the screen, None if its off the grid. zoomed out its the top left cell
+        # of the block under it
+        row = self.top + int(y / self.zoom)
+        col = self.left + int(x / self.zoom)
+        if x < 0 or y < 0 or row >= self.rows or col >= self.cols:
+            return None
+        return row, col
+
+    def zoomAt(self, steps, x, y):
+        # zooms in (steps > 0) or out a number of levels, keeping the cell under (x, y) where it is
+        zooms = sorted({zoom for zoom in ZOOMS if zoom >= self.min_zoom} | {self.zoom, self.min_zoom})
+        index = min(max(zooms.index(self.zoom) + steps, 0), len(zooms) - 1)
+        row, col = self.top + y / self.zoom, self.left + x / self.zoom
+        self.zoom = zooms[index]
+        self.top = int(row - y / self.zoom)
+        self.left = int(col - x / self.zoom)
+        self.clamp()
+
+    def pan(self, rows, cols):
+        # moves the view by a fraction of the screen (rows/cols of -1 to 1)
+        span_rows, span_cols = self.span()
+        self.top += int(rows * span_rows)
+        self.left += int(cols * span_cols)
+        self.clamp()
+
+    def key(self):
+        return self.zoom, self.top, self.left, self.width, self.height
+
+
+class GridRenderer:
+    # draws the grid onto a surface: state array -> color lookup -> pixel array -> scaled up surface,
+    # with the gridlines drawn once onto a see-through overlay that gets reused until the size changes.
+    # after the first frame it only repaints what the GridModel says changed (see GridModel.takeDirty), one cell at a
+    # time for a few edits, or in runs of changed blocks for anything bigger.
+    # it only draws the region of the grid the viewport has on screen, with the regions top left cell in the corner
+    def __init__(self):
+        self.overlay = None
+        self.overlay_key = None  # (rows, cols, block_size) the overlay was made for
+        self.source = None       # GridModel it last drew, and its version then
+        self.version = None
+        self.surface = None      # surface it was drawn on
+        self.layout = None       # Viewport.key() it was drawn for
+
+    def gridlines(self, rows, cols, block_size):
+        if self.overlay_key != (rows, cols, block_size):
+            self.overlay = pygame.Surface((cols * block_size, rows * block_size), pygame.SRCALPHA)
+            self.overlay_key = (rows, cols, block_size)
+            if block_size >= 4:  # any smaller and the lines would cover the cells, so just leave them off
+                for col in range(cols):  # each cell gets a 1 pixel outline, like the old per-cell boxes had
+                    x = col * block_size
+                    pygame.draw.line(self.overlay, BLACK, (x, 0), (x, rows * block_size - 1))
+                    pygame.draw.line(self.overlay, BLACK, (x + block_size - 1, 0), (x + block_size - 1, rows * block_size - 1))
+                for row in range(rows):
+                    y = row * block_size
+                    pygame.draw.line(self.overlay, BLACK, (0, y), (cols * block_size - 1, y))
+                    pygame.draw.line(self.overlay, BLACK, (0, y + block_size - 1), (cols * block_size - 1, y + block_size - 1))
+        return self.overlay
+
+    def paint(self, surface, cells, top, left, block_size):
+        # paints a block of cells (all at once) with its top left cell at (top, left), returns the rect it covered
+        rows, cols = cells.shape
+        pixels = COLORS[cells]  # (rows, cols, 3) colors
+        image = pygame.surfarray.make_surface(pixels.transpose(1, 0, 2))  # surfarray wants (x, y) so swap rows/cols
+        rect = pygame.Rect(left * block_size, top * block_size, cols * block_size, rows * block_size)
+        surface.blit(pygame.transform.scale(image, rect.size), rect)
+        surface.blit(self.overlay, rect, rect)  # gridlines for just that area
+        return rect
+
+    def draw(self, surface, grid, region, block_size, layout=None):
+        # brings the surface up to date with the (top, left, bottom, right) region of a GridModel, returns a list of
+        # the rects that changed
+        top, left, bottom, right = region
+        self.gridlines(bottom - top, right - left, block_size)
+        if grid is not self.source or surface is not self.surface or layout != self.layout:
+            self.surface = surface  # new grid, new surface or the view moved, so everything has to be drawn
+            self.layout = layout
+            self.source = grid
+            self.version = grid.version
+            grid.takeDirty(*region)  # about to draw all of it anyway
+            surface.fill(BLACK)  # anything past the edge of the grid
+            self.paint(surface, grid.cells(*region), 0, 0, block_size)
+            return [surface.get_rect()]
+        if grid.version == self.version:
+            return []  # nothing has changed
+        self.version = grid.version
+
+        cells, tiles = grid.takeDirty(*region)
+        rects = []
+        if cells is not None:
+            for row, col in cells:
+                rect = pygame.Rect((col - left) * block_size, (row - top) * block_size, block_size, block_size)
+                surface.fill(CELL_COLORS[grid.cells(row, col, row + 1, col + 1)[0, 0]], rect)
+                surface.blit(self.overlay, rect, rect)
+                rects.append(rect)
+        elif tiles.all():  # the whole region, so just do it in one go
+            rects.append(self.paint(surface, grid.cells(*region), 0, 0, block_size))
+        else:
+            for tile_row in np.flatnonzero(tiles.any(axis=1)).tolist():
+                row = (top // TILE + tile_row) * TILE
+                tile_cols = np.flatnonzero(tiles[tile_row])
+                for run in np.split(tile_cols, np.flatnonzero(np.diff(tile_cols) > 1) + 1):  # neighbouring blocks
+                    col = (left // TILE + run[0].item()) * TILE                              # get painted together
+                    area = (max(row, top), max(col, left), min(row + TILE, bottom),
+                            min(col + len(run) * TILE, right))
+                    rects.append(self.paint(surface, grid.cells(*area), area[0] - top, area[1] - left, block_size))
+        return rects
 
 
 class Button:
@@ -161,7 +253,7 @@ class Button:
 
 
 class Window:
-    def __init__(self, width, height, rel_menu_size, grid_size):
+    def __init__(self, width, height, rel_menu_size, grid_size, loaded=None, map_path=None):
         self.width = width
         self.height = height
         self.rel_menu_size = rel_menu_size
@@ -170,22 +262,53 @@ class Window:
         self.game_screen = pygame.Surface((int(self.width * (1 - self.rel_menu_size)), int(self.width * (1 - self.rel_menu_size))))  # Create the first inner screen (game screen)
         self.menu_screen = pygame.Surface((self.width * self.rel_menu_size, self.height))  # Create the second inner screen (menu screen)
         self.buttons = []
+        self.renderer = GridRenderer()
+        self.viewport = Viewport(grid_size, grid_size, *self.game_screen.get_size())
+        self.menu_key = None            # what the menu looked like last time it was drawn
+        self.algorithm = 'A*'           # name of the search to run, from SearchEngine.ALGORITHMS or PLANNERS
+        self.dropdown_open = False      # whether the algorithm list is showing
+        self.algorithm_buttons = []     # (name, button) for each algorithm in the open dropdown
+        self.speed = 'Instant'          # key into SPEEDS
+        self.search_steps = None        # step generator of a search being stepped each frame, None when theres none
+        self.search_job = None          # SearchJob of a search running in the background, None when theres none
+        self.executor = SearchExecutor('thread', 1)
+        self.queries = BatchSearch()    # remembers finished searches until the walls change
+        self.search_query = None        # (cache version, algorithm, start, end) the running search was started with
+        self.planner = None             # planner from PLANNERS kept from the last run, if one of those was picked
+        self.replan = False             # set when the planner needs to catch up with edits
+        self.search_start = 0           # time.time() the running search was started
+        self.moves = 4                  # 4 or 8 (diagonals)
+        self.heuristic = None           # name from SearchEngine.HEURISTICS, None for the default for the moves
+        self.tie_break = 'h'            # from SearchEngine.TIE_BREAKS
+        self.loaded = loaded            # (walls, costs, start, end) from MapFiles.readMap to start from (and reset to)
+        self.save_path = map_path if map_path and map_path.endswith('.grid') else 'map.grid'  # where "s" saves to
+        self.counters = None            # counters for the last (or running) search, see newCounters
+        self.history = []               # counters for every finished search, what "e" exports
+        self.timing = False             # whether drawing time is being added to the counters
+        self.profile = False            # run searches under cProfile
         self.runWindow()
 
-    def drawGrid(self, block_size, grid):  # given grid should be 2D array of values 0-5
-        x_pos = 0
-        y_pos = 0
-        for row in grid:
-            for col in row:
-                grid_box = Box(x_pos, y_pos, block_size, col)
-                grid_box.draw(self.game_screen)
-                x_pos += block_size
-            y_pos += block_size
-            x_pos = 0
-        self.win.blit(self.game_screen, (0, 0))
-        pygame.display.update()
+    def drawGrid(self, grid):  # given grid should be a GridModel
+        # only the cells the viewport has on screen get drawn, and zoomed out they come from a shrunk copy of the grid
+        view = self.viewport
+        top, left, bottom, right = view.visible()
+        if view.factor > 1:
+            factor = view.factor
+            rects = self.renderer.draw(self.game_screen, grid.lod(factor), (top // factor, left // factor,
+                                       -(-bottom // factor), -(-right // factor)), view.block, view.key())
+        else:
+            rects = self.renderer.draw(self.game_screen, grid, (top, left, bottom, right), view.block, view.key())
+        for rect in rects:  # only copy/update the parts of the screen that changed
+            self.win.blit(self.game_screen, rect, rect)
+        if rects:
+            pygame.display.update(rects)
 
     def drawMenu(self):
+        menu_key = (self.menu_screen, self.algorithm, self.dropdown_open, self.speed, self.searching(),
+                    self.settingsText(), tuple(self.counterLines()))  # everything the menu depends on
+        if menu_key == self.menu_key:
+            return  # nothing changed since last time, so leave it as it is
+        self.menu_key = menu_key
         self.buttons = []
         pygame.draw.rect(self.menu_screen, GRAY, (0, 0, self.menu_screen.get_width(), self.menu_screen.get_height()))  # menu background
         margin = int(self.menu_screen.get_width() * 0.1)
@@ -195,36 +318,281 @@ class Window:
 
         # Create buttons
         button_position = (int(self.menu_screen.get_width() * 0.25), int(self.menu_screen.get_height() * 0.85))
-        run_button = Button(button_position, button_len, button_width, GREEN, 'Run', BLACK, text_size)
+        if not self.searching():
+            run_button = Button(button_position, button_len, button_width, GREEN, 'Run', BLACK, text_size)
+        else:
+            run_button = Button(button_position, button_len, button_width, YELLOW, 'Cancel', BLACK, text_size)
         self.buttons.append(run_button)
 
         button_position = (button_position[0], button_position[1] - button_width - margin)
         reset_button = Button(button_position, button_len, button_width, RED, 'Reset', BLACK, text_size)
         self.buttons.append(reset_button)
 
+        button_position = (button_position[0], button_position[1] - button_width - margin)
+        speed_button = Button(button_position, button_len, button_width, WHITE, self.speed, BLACK, text_size)
+
+        # algorithm select box at the top, with the list of choices under it when its open
+        button_position = (margin, int(self.menu_screen.get_height() * 0.05))
+        select_len = self.menu_screen.get_width() - 2 * margin
+        select_button = Button(button_position, select_len, button_width, WHITE, self.algorithm + (' ^' if self.dropdown_open else ' v'), BLACK, text_size)
+        self.buttons.append(select_button)
+        self.buttons.append(speed_button)  # added after the select box so the button indexes dont move around
+
+        self.algorithm_buttons = []
+        if self.dropdown_open:
+            option_width = int(button_width * 0.6)
+            for index, name in enumerate(list(ALGORITHMS) + list(PLANNERS)):
+                option_position = (button_position[0], button_position[1] + button_width + index * option_width)
+                color = YELLOW if name == self.algorithm else WHITE
+                self.algorithm_buttons.append((name, Button(option_position, select_len, option_width, color, name, BLACK, int(text_size * 0.8))))
+
         # Draw buttons
         run_button.draw(self.menu_screen)
         reset_button.draw(self.menu_screen)
+        speed_button.draw(self.menu_screen)
+        font = pygame.font.Font('freesansbold.ttf', int(text_size * 0.8))  # search settings, just above the speed button
+        settings = font.render(self.settingsText(), True, BLACK, GRAY)
+        self.menu_screen.blit(settings, settings.get_rect(midbottom=(speed_button.rect.centerx, speed_button.rect.top - margin // 2)))
+        y = select_button.rect.bottom + margin // 2  # counters from the last search, under the select box
+        for line in self.counterLines():
+            text = font.render(line, True, BLACK, GRAY)
+            self.menu_screen.blit(text, (margin, y))
+            y += text.get_height() + 2
+        select_button.draw(self.menu_screen)
+        for name, option_button in self.algorithm_buttons:
+            option_button.draw(self.menu_screen)
         self.win.blit(self.menu_screen, (self.game_screen.get_width(), 0))
-        pygame.display.update()
+        pygame.display.update(pygame.Rect((self.game_screen.get_width(), 0), self.menu_screen.get_size()))
+
+    def mouseCell(self):
+        # (row, col) of the cell under the mouse, None if its not over the grid
+        pos = pygame.mouse.get_pos()
+        if pos[0] >= self.game_screen.get_width() or pos[1] >= self.game_screen.get_height():
+            return None
+        return self.viewport.toCell(*pos)
+
+    def mouseOver(self, button):  # checks if the mouse is on a menu button (buttons are positioned inside the menu screen)
+        pos = pygame.mouse.get_pos()
+        return button.rect.collidepoint(pos[0] - self.game_screen.get_width(), pos[1])
+
+    def settingsText(self):
+        return (str(self.moves) + ' moves, ' + (self.heuristic or ('octile' if self.moves == 8 else 'manhattan'))
+                + ', ties: ' + self.tie_break + (', profiling' if self.profile else ''))
+
+    def newCounters(self, kind):
+        # starts counting for a new search (kind is 'search' or 'replan'), drawing time gets added until its shown
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.counters.update({'algorithm': self.algorithm, 'kind': kind, 'settings': self.settingsText(),
+                              'render_time': 0.0, 'found': False})
+        self.timing = True
+
+    def recordCounters(self, path, stats):
+        # fills in the counters from a finished searches stats, and keeps them for exporting
+        for name in COUNTERS:
+            self.counters[name] = stats.get(name, 0)
+        self.counters['cost'] = stats['cost'] if path else None  # no path is inf, which json cant hold
+        self.counters['found'] = bool(path)
+        if stats.get('method') == 'cache':
+            self.counters['kind'] = 'cached'
+        self.history.append(self.counters)
+
+    def counterLines(self):
+        # the counters as lines of text for the menu
+        counters = self.counters
+        if counters is None:
+            return []
+        if not counters['found']:
+            path = 'searching...' if self.searching() else 'no path'
+        else:
+            path = str(counters['path_length']) + ' steps, cost ' + str(round(counters['cost'], 2))
+        return [counters['algorithm'] + ' (' + counters['kind'] + ')',
+                'expanded: ' + str(counters['expanded']),
+                'generated: ' + str(counters['generated']),
+                'open peak: ' + str(counters['peak_open']),
+                're-opened: ' + str(counters['reopened']),
+                'heuristic calls: ' + str(counters['heuristic_calls']),
+                'path: ' + path,
+                'search: ' + "{:.1f}".format(counters['time'] * 1000) + ' ms (setup '
+                + "{:.1f}".format(counters['setup_time'] * 1000) + ')',
+                'drawing: ' + "{:.1f}".format(counters['render_time'] * 1000) + ' ms']
+
+    def exportCounters(self):
+        with open(STATS_PATH, 'w') as output:
+            json.dump(self.history, output, indent=2)
+            output.write('\n')
+        print("exported the counters for " + str(len(self.history)) + " searches to " + STATS_PATH)
+
+    def searchOptions(self, grid):
+        # options for the search engine from the current settings and mud
+        return {'moves': self.moves, 'heuristic': self.heuristic, 'tie_break': self.tie_break,
+                'costs': grid.costSnapshot()}
+
+    def settingsChanged(self):
+        self.queries.invalidate()  # old results were for the old settings
+        self.dropPlanner()
+        print("search settings: " + self.settingsText())
+
+    def searching(self):
+        return self.search_steps is not None or self.search_job is not None
+
+    def startSearch(self, grid):
+        grid.clear()  # clear off anything left from an earlier search
+        start, end = grid.start, grid.end
+        self.search_start = time.time()
+        self.search_query = (self.queries.version, self.algorithm, start, end)
+        walls = grid.snapshot()  # search engine only cares about walls, and this stays the same whatever gets edited
+        options = self.searchOptions(grid)
+        if self.algorithm in UNIFORM_ONLY:
+            try:
+                checkUniform(options, self.algorithm)
+            except ValueError as error:
+                print(str(error) + ", turn diagonal moves off and clear the mud to use it.")
+                return
+        self.newCounters('search')  # only once its really going to run
+        if self.profile:  # runs it here and now instead, so the profile only has the search in it
+            profiler = cProfile.Profile()
+            if self.algorithm in PLANNERS:
+                self.planner = PLANNERS[self.algorithm](walls, start, end)
+                path, stats = profiler.runcall(self.planner.plan)
+            else:
+                path, stats = profiler.runcall(ALGORITHMS[self.algorithm], walls, start, end, options)
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(PROFILE_LINES)
+            self.finishSearch(grid, path, stats)
+            return
+        if self.algorithm in PLANNERS:  # planners run straight away, and stay around for edits
+            self.planner = PLANNERS[self.algorithm](walls, start, end)
+            self.finishSearch(grid, *self.planner.plan())
+            return
+        cached = self.queries.cached(self.algorithm, start, end)
+        if cached is not None:  # same search on the same walls as before, so just show the answer again
+            self.finishSearch(grid, *cached)
+            return
+        if SPEEDS[self.speed] is None:
+            self.search_job = self.executor.submit(self.algorithm, walls, start, end, options, progress=True,
+                                                   timeout=SEARCH_TIMEOUT, batch=256)
+        else:
+            self.search_steps = STEPS[self.algorithm](walls, start, end, dict(options, batch=SPEEDS[self.speed]))
+
+    def markSearched(self, grid, expanded, generated):
+        t0 = time.perf_counter()
+        grid.mark('visited', expanded)    # yellow
+        grid.mark('frontier', generated)  # pale yellow until they get expanded too
+        self.counters['expanded'] += len(expanded)  # live counts until the search finishes
+        self.counters['generated'] += len(generated)
+        self.counters['render_time'] += time.perf_counter() - t0
+
+    def stepSearch(self, grid):
+        # moves the search along one frames worth and colors what it looked at, returns True when its done
+        if self.search_job is not None:
+            for job_id, expanded, generated in self.executor.progress():
+                if job_id == self.search_job.job_id:  # anything else is left over from a cancelled search
+                    self.markSearched(grid, expanded, generated)
+            if not self.search_job.done():
+                return False
+            path, stats = self.search_job.result()
+            self.search_job = None
+            if stats['status'] == 'timeout':
+                print("search timed out after " + str(SEARCH_TIMEOUT) + " seconds.")
+                self.counters['kind'] = 'timed out'
+                return True
+        else:
+            try:
+                expanded, generated = next(self.search_steps)
+                self.markSearched(grid, expanded, generated)
+                return False  # thats all for this frame
+            except StopIteration as done:
+                path, stats = done.value
+            self.search_steps = None
+        version, algorithm, start, end = self.search_query
+        if version == self.queries.version:  # anything edited while it ran means its answer is for the old grid
+            self.queries.store(algorithm, start, end, path, stats)
+        self.finishSearch(grid, path, stats)
+        return True
+
+    def finishSearch(self, grid, path, stats):
+        if 'visited' in stats:  # cached results dont keep this
+            grid.mark('visited', stats['visited'])
+        grid.mark('path', path)  # makes the path blue (the start/end stay on top)
+        self.recordCounters(path, stats)  # the rest of the stats go in the menu
+
+        if path:
+            print("path found!")
+            print("the path is " + str(len(path) - 1) + " steps.")
+        else:
+            print("no path found!")
+        if stats.get('method') == 'cache':
+            print("(same as last time, the walls havent changed)")
+        else:
+            print("the search took " + str("{:.3f}".format(stats['time'])) + " seconds ("
+                  + str("{:.3f}".format(time.time() - self.search_start)) + " seconds with drawing).")
+
+    def wallChanged(self, row, col, wall):
+        # called after every wall edit (once its been made to the grid)
+        self.queries.invalidate()  # walls changed, so old results are no good
+        if self.planner is not None:
+            self.planner.setWall((row, col), wall)
+            self.replan = True
+
+    def costChanged(self):
+        # called after mud gets added or removed
+        self.queries.invalidate()
+        self.dropPlanner()  # planners dont know about mud, so they cant keep up with it
+
+    def dropPlanner(self):
+        # edits from this frame may have asked for a replan, which has nothing to run on now
+        self.planner = None
+        self.replan = False
+
+    def runPlanner(self, grid):
+        # brings the planner up to date with the edits since last frame and shows its new path
+        grid.clear()
+        self.newCounters('replan')
+        path, stats = self.planner.plan()
+        grid.mark('visited', stats['visited'])  # only whatever the repair had to look at
+        grid.mark('path', path)
+        self.recordCounters(path, stats)
+        self.replan = False
+        print("replanned in " + str("{:.4f}".format(stats['time'])) + " seconds, looked at " + str(stats['expanded'])
+              + " cells, the path is " + (str(len(path) - 1) + " steps." if path else "blocked."))
+
+    def cancelSearch(self):
+        if self.search_steps is not None:
+            self.search_steps.close()
+            self.search_steps = None
+            self.counters['kind'] = 'cancelled'
+            print("search cancelled.")
+        if self.search_job is not None:
+            self.search_job.cancel()
+            self.search_job = None
+            self.counters['kind'] = 'cancelled'
+            print("search cancelled.")
 
     def runWindow(self):
-        grid = [[0 for i in range(self.grid_size)] for j in range(self.grid_size)]  # creating grid of 0's
-        grid[0][0] = 2  # placing default start node
-        grid[self.grid_size - 1][self.grid_size - 1] = 3  # placing default end node
-        start = [0, 0]  # storing start node
-        end = [self.grid_size - 1, self.grid_size - 1]  # storing end node
+        grid = GridModel(self.grid_size)  # empty grid, start in the top left and end in the bottom right
+        if self.loaded is not None:
+            grid.load(*self.loaded)
         running = True
         searched = False
         left_hold = False
         right_hold = False
+        middle_hold = False
+        clock = pygame.time.Clock()
         while running:  # start of main loop
-            block_size = (self.game_screen.get_height() // self.grid_size)
-            self.drawGrid(block_size, grid)
+            clock.tick(60)  # nothing needs redrawing most frames, so dont spin faster than the screen can show
+            if self.searching():
+                self.stepSearch(grid)
+            if self.replan and self.planner is not None:
+                self.runPlanner(grid)
+            t0 = time.perf_counter()
+            self.drawGrid(grid)
+            if self.timing:  # counts every frame of a search, and the one that shows how it ended
+                self.counters['render_time'] += time.perf_counter() - t0
+                self.timing = self.searching()
             self.drawMenu()
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:   # to close properly
+                    self.executor.shutdown(wait=False)
                     pygame.quit()
                     sys.exit()
 
@@ -235,21 +603,20 @@ class Window:
                     else:
                         self.game_screen = pygame.Surface((int(event.w * (1 - self.rel_menu_size)), int(event.w * (1 - self.rel_menu_size))))
                     self.menu_screen = pygame.Surface((event.w * self.rel_menu_size, event.h))  # Create the second inner screen (menu screen)
+                    self.viewport.resize(*self.game_screen.get_size())
+
+                # mouse wheel over the grid zooms in/out around the mouse
+                elif event.type == pygame.MOUSEWHEEL and self.mouseCell() is not None:
+                    self.viewport.zoomAt(event.y, *pygame.mouse.get_pos())
 
                 # left click in grid to add wall blocks
                 elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 \
                         and pygame.mouse.get_pos()[0] < self.game_screen.get_width() \
                         and pygame.mouse.get_pos()[1] < self.game_screen.get_height():
                     left_hold = True
-                    pos = pygame.mouse.get_pos()
-                    col = pos[0] // block_size
-                    row = pos[1] // block_size
-                    if col >= gridSize:
-                        col = gridSize - 1
-                    if row >= gridSize:
-                        row = gridSize - 1
-                    if grid[row][col] == 0:
-                        grid[row][col] = 1
+                    cell = self.mouseCell()
+                    if cell is not None and grid.setWall(*cell, True):  # anything thats not a wall or the start/end
+                        self.wallChanged(*cell, True)
 
                 elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:  # for dragging
                     left_hold = False
@@ -259,113 +626,161 @@ class Window:
                         and pygame.mouse.get_pos()[0] < self.game_screen.get_width() \
                         and pygame.mouse.get_pos()[1] < self.game_screen.get_height():
                     right_hold = True
-                    pos = pygame.mouse.get_pos()
-                    col = pos[0] // block_size
-                    row = pos[1] // block_size
-                    if col >= gridSize:
-                        col = gridSize - 1
-                    if row >= gridSize:
-                        row = gridSize - 1
-                    if grid[row][col] == 1:
-                        grid[row][col] = 0
+                    cell = self.mouseCell()
+                    if cell is not None and grid.setWall(*cell, False):
+                        self.wallChanged(*cell, False)
+                    if cell is not None and grid.setCost(*cell, 1):
+                        self.costChanged()
 
                 elif event.type == pygame.MOUSEBUTTONUP and event.button == 3:  # for dragging
                     right_hold = False
 
-                elif event.type == pygame.MOUSEMOTION \
+                # middle click in grid to add mud
+                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 2 \
                         and pygame.mouse.get_pos()[0] < self.game_screen.get_width() \
-                        and pygame.mouse.get_pos()[1] < self.game_screen.get_height():      # also for dragging
-                    pos = pygame.mouse.get_pos()
-                    col = pos[0] // block_size
-                    row = pos[1] // block_size
-                    if col >= gridSize:
-                        col = gridSize - 1
-                    if row >= gridSize:
-                        row = gridSize - 1
-                    if left_hold and grid[row][col] == 0:  # left hold adds walls while dragging
-                            grid[row][col] = 1    # if empty spot (label 0), turn it into a wall (label 1)
-                    elif right_hold and grid[row][col] == 1:  # right hold removes walls while dragging
-                            grid[row][col] = 0   # if wall (label 1), turn it into a empty spot (label 0)
-
-                # if clicked in "run" box, then run the thing
+                        and pygame.mouse.get_pos()[1] < self.game_screen.get_height():
+                    middle_hold = True
+                    cell = self.mouseCell()
+                    if cell is not None and not grid.isWall(*cell) and grid.setCost(*cell, MUD_COST):
+                        self.costChanged()
+
+                elif event.type == pygame.MOUSEBUTTONUP and event.button == 2:  # for dragging
+                    middle_hold = False
+
+                elif event.type == pygame.MOUSEMOTION and self.mouseCell() is not None:      # also for dragging
+                    row, col = self.mouseCell()
+                    if left_hold and grid.setWall(row, col, True):  # left hold adds walls while dragging
+                        self.wallChanged(row, col, True)
+                    elif right_hold:  # right hold removes walls (and mud) while dragging
+                        if grid.setWall(row, col, False):
+                            self.wallChanged(row, col, False)
+                        if grid.setCost(row, col, 1):
+                            self.costChanged()
+                    elif middle_hold and not grid.isWall(row, col) and grid.setCost(row, col, MUD_COST):
+                        self.costChanged()
+
+                # clicking the algorithm box opens/closes the list of algorithms
+                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.mouseOver(self.buttons[2]):
+                    self.dropdown_open = not self.dropdown_open
+
+                # clicking an algorithm in the open list selects it
+                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.dropdown_open \
+                        and any(self.mouseOver(option_button) for name, option_button in self.algorithm_buttons):
+                    for name, option_button in self.algorithm_buttons:
+                        if self.mouseOver(option_button):
+                            self.algorithm = name
+                            self.dropPlanner()  # a new pick needs a new run
+                    self.dropdown_open = False
+
+                # clicking the speed button switches to the next speed
+                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.mouseOver(self.buttons[3]):
+                    speeds = list(SPEEDS)
+                    self.speed = speeds[(speeds.index(self.speed) + 1) % len(speeds)]
+
+                # if clicked in "run" box, then run the thing (or cancel it, if its already running)
                 elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 \
                         and self.buttons[0].position[0] + self.game_screen.get_width() + self.buttons[0].length > pygame.mouse.get_pos()[0] > self.buttons[0].position[0] + self.game_screen.get_width() \
                         and self.buttons[0].position[1] + self.buttons[0].width > pygame.mouse.get_pos()[1] > self.buttons[0].position[1]:
 
-                    t0 = time.time()
-                    path = AStarSearch(self, block_size, grid, start, end)  # calling A*, and timing it
-                    t1 = time.time()
-
-                    for x in range(1, len(path) - 1):  # makes the path blue, except for start/end nodes
-                        step = path[x]
-                        grid[step[0]][step[1]] = 4  # the change to blue (4 = blue)
-
-                    searched = True
-                    print("path found!")  # fun stats :D
-                    print("the path is " + str(len(path) - 1) + " steps.")
-                    print("the search took " + str("{:.3f}".format(t1 - t0)) + " seconds.")
+                    if not self.searching():
+                        self.startSearch(grid)
+                        searched = True
+                    else:
+                        self.cancelSearch()
 
                 # if clicked in "reset" box then reset the thing
                 elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 \
                         and self.buttons[1].position[0] + self.game_screen.get_width() + self.buttons[1].length > pygame.mouse.get_pos()[0] > self.buttons[1].position[0] + self.game_screen.get_width() \
                         and self.buttons[1].position[1] + self.buttons[1].width > pygame.mouse.get_pos()[1] > self.buttons[1].position[1]:
 
-                    grid = [[0 for i in range(self.grid_size)] for j in range(self.grid_size)]  # makes new grid
-                    grid[0][0] = 2  # places start point (2 = green)
-                    grid[self.grid_size - 1][self.grid_size - 1] = 3  # places end point (3 = red)
-                    start = [0, 0]  # store start
-                    end = [self.grid_size - 1, self.grid_size - 1]  # store end
+                    self.cancelSearch()
+                    self.queries.invalidate()
+                    self.dropPlanner()
+                    grid.reset()  # empties the grid and puts the start/end back in the corners
+                    if self.loaded is not None:
+                        grid.load(*self.loaded)  # or back to the map it started with
                     searched = False  # clear search state
 
                 # for keyboard presses (some buttons repeated but for keyboard now)
                 elif event.type == pygame.KEYDOWN:
                     # space key will reset everything to default
                     if event.key == pygame.K_SPACE:
-                        grid = [[0 for i in range(self.grid_size)] for j in range(self.grid_size)]  # makes new grid
-                        grid[0][0] = 2  # places start point (2 = green)
-                        grid[self.grid_size - 1][self.grid_size - 1] = 3  # places end point (3 = red)
-                        start = [0, 0]  # store start
-                        end = [self.grid_size - 1, self.grid_size - 1]  # store end
+                        self.cancelSearch()
+                        self.queries.invalidate()
+                        self.dropPlanner()
+                        grid.reset()  # empties the grid and puts the start/end back in the corners
+                        if self.loaded is not None:
+                            grid.load(*self.loaded)  # or back to the map it started with
                         searched = False  # clear search state
 
-                    # enter key will preform the A* search
+                    # enter key will preform the search
                     elif event.key == pygame.K_RETURN and not searched:
-                        t0 = time.time()
-                        path = AStarSearch(self, block_size, grid, start, end)  # calling A*, and timing it
-                        t1 = time.time()
+                        self.startSearch(grid)
+                        searched = True
 
-                        for x in range(1, len(path) - 1):  # makes the path blue, except for start/end nodes
-                            step = path[x]
-                            grid[step[0]][step[1]] = 4  # the change to blue (4 = blue)
+                    # escape key stops a search part way through
+                    elif event.key == pygame.K_ESCAPE:
+                        self.cancelSearch()
 
-                        searched = True
-                        print("path found!")  # fun stats :D
-                        print("the path is " + str(len(path) - 1) + " steps.")
-                        print("the search took " + str("{:.3f}".format(t1 - t0)) + " seconds.")
+                    # "s" saves the grid (walls, mud and start/end) so it can be opened again later
+                    elif event.key == pygame.K_s:
+                        saveGrid(self.save_path, grid.terrain, grid.start, grid.end,
+                                 grid.costs if grid.weighted else None)
+                        print("saved to " + self.save_path)
+
+                    # "e" exports the counters of every search so far
+                    elif event.key == pygame.K_e:
+                        self.exportCounters()
+
+                    # "p" turns profiling on/off
+                    elif event.key == pygame.K_p:
+                        self.profile = not self.profile
+
+                    # "d" switches between 4 and 8 (diagonal) moves
+                    elif event.key == pygame.K_d:
+                        self.moves = 12 - self.moves
+                        self.settingsChanged()
+
+                    # "h" picks the next heuristic (None is the default for the moves)
+                    elif event.key == pygame.K_h:
+                        choices = [None] + list(HEURISTICS)
+                        self.heuristic = choices[(choices.index(self.heuristic) + 1) % len(choices)]
+                        self.settingsChanged()
+
+                    # "t" picks the next way of breaking ties
+                    elif event.key == pygame.K_t:
+                        self.tie_break = TIE_BREAKS[(TIE_BREAKS.index(self.tie_break) + 1) % len(TIE_BREAKS)]
+                        self.settingsChanged()
+
+                    # the arrow keys move the view around the grid, a quarter of the screen at a time
+                    elif event.key in PAN_KEYS:
+                        self.viewport.pan(*PAN_KEYS[event.key])
+
+                    # "f" zooms back out to fit the whole grid on screen
+                    elif event.key == pygame.K_f:
+                        self.viewport.fit()
 
                     # the "1" key moves start point
-                    elif event.key == pygame.K_1 \
-                            and (pygame.mouse.get_pos()[0] // block_size) < self.grid_size \
-                            and (pygame.mouse.get_pos()[1] // block_size) < self.grid_size:
-                        pos = pygame.mouse.get_pos()
-                        col = pos[0] // block_size
-                        row = pos[1] // block_size
-                        if [col, row] != end:  # if new point isnt the end point
-                            grid[start[0]][start[1]] = 0  # changes previous start to a 0
-                            grid[row][col] = 2  # assigns new start position (2 = green)
-                            start = [row, col]  # store new start
+                    elif event.key == pygame.K_1 and not self.searching() and self.mouseCell() is not None:
+                        row, col = self.mouseCell()
+                        was_wall = grid.isWall(row, col)
+                        if grid.moveStart(row, col):  # if new point isnt the end point
+                            if was_wall:  # moving onto a wall takes the wall away
+                                self.wallChanged(row, col, False)
+                            if self.planner is not None:
+                                self.planner.moveStart(grid.start)
+                                self.replan = True
 
                     # the "2" key moves end point
-                    elif event.key == pygame.K_2 \
-                            and (pygame.mouse.get_pos()[0] // block_size) < self.grid_size \
-                            and (pygame.mouse.get_pos()[1] // block_size) < self.grid_size:
-                        pos = pygame.mouse.get_pos()
-                        col = pos[0] // block_size
-                        row = pos[1] // block_size
-                        if [col, row] != start:  # if new point isnt start point
-                            grid[end[0]][end[1]] = 0  # changes previous end to a 0
-                            grid[row][col] = 3  # assigns new end position (3 = red)
-                            end = [row, col]  # store new end
+                    elif event.key == pygame.K_2 and not self.searching() and self.mouseCell() is not None:
+                        row, col = self.mouseCell()
+                        was_wall = grid.isWall(row, col)
+                        if grid.moveEnd(row, col):  # if new point isnt start point
+                            if was_wall:
+                                self.wallChanged(row, col, False)
+                            if self.planner is not None:
+                                self.planner.moveEnd(grid.end)
+                                self.replan = True
 
 
 if __name__ == '__main__':
@@ -373,5 +788,7 @@ if __name__ == '__main__':
     length = 1000                      # height of window, width will be larger to fit side menu
     width = 750
     rel_menu_size = 0.25
-    gridSize = 20                     # size of grid, x by x blocks
-    window = Window(length, width, rel_menu_size, gridSize)
+    map_path = sys.argv[1] if len(sys.argv) > 1 else None  # map file to start from, a .grid or a MovingAI .map
+    loaded = readMap(map_path) if map_path else None
+    gridSize = max(loaded[0].shape) if loaded else 20   # size of grid, x by x blocks
+    window = Window(length, width, rel_menu_size, gridSize, loaded, map_path)
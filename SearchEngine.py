@@ -0,0 +1,677 @@
+import array
+import cProfile
+import heapq
+import pstats
+import time
+import numpy as np
+
+# headless search engine for the path finder, no pygame in here so it can be used by the window, benchmarks, scripts...
+# grids are 2D numpy arrays where any non-zero value is a wall, positions are (row, col) pairs.
+# internally the grid gets a 1 cell border of walls and is flattened, so a cell is just an int index
+# and moving is adding an offset to it (no bounds checks needed, the border stops everything).
+# the searches take these options (all optional):
+#   'costs'     - array the same shape as the grid, the cost of stepping onto each cell (default 1 everywhere)
+#   'moves'     - 4 (default) or 8 to allow diagonal steps, which cost sqrt(2) times the cell cost
+#   'corners'   - when a diagonal step can pass the corner of a wall: 'never' (default, both cells beside the step
+#                 have to be open), 'one' (can cut one corner but not squeeze between two walls) or 'always'
+#   'heuristic' - one of HEURISTICS, default manhattan for 4 moves and octile for 8
+#   'tie_break' - how equal f values are ordered: 'h' (default, closest to the end first), 'cross' (closest to the
+#                 straight line from start to end first, gives straighter looking paths) or 'none'
+#   'batch'     - see the step generators below
+#   'prepared'  - see prepareGrid
+#   'trace'     - called as trace(expanded, generated) with each batch of cells, see runSearch
+#   'profile'   - run the search under cProfile, see runSearch
+
+INF = float('inf')
+TRACE_BATCH = 1024   # batch size used for 'trace' when no batch is given
+DIAGONAL = 2 ** 0.5  # length of a diagonal step
+CORNERS = {'never': 0, 'one': 1, 'always': 2}  # most walls allowed beside a diagonal step
+TIE_BREAKS = ('h', 'cross', 'none')
+KEY_DIGITS = 6       # decimals heap keys get rounded to when they arent whole numbers, see fractionalKeys
+
+
+# heuristics as functions of the row/col distances to the end, done on whole arrays at once. all of them are
+# admissible for 4 moves, for 8 moves manhattan can overestimate (it doesnt know about diagonals) so A* with it
+# might not find the cheapest path
+HEURISTICS = {'manhattan': lambda rows, cols: rows + cols,
+              'octile': lambda rows, cols: np.maximum(rows, cols) + (DIAGONAL - 1) * np.minimum(rows, cols),
+              'euclidean': lambda rows, cols: np.sqrt(rows * rows + cols * cols),
+              'chebyshev': lambda rows, cols: np.maximum(rows, cols)}
+
+
+def prepareGrid(grid, options=None):
+    # turns an occupancy grid into a flat padded wall list, returns (blocked, rows, cols, width).
+    # if options['prepared'] already holds that tuple for this grid its used as is, so callers running lots of
+    # searches on one map only pay for this once.
+    if options and options.get('prepared') is not None:
+        return options['prepared']
+    walls = np.asarray(grid, dtype=bool)
+    rows, cols = walls.shape
+    padded = np.pad(walls, 1, mode='constant', constant_values=True)  # border of walls around the whole grid
+    return padded.ravel().tolist(), rows, cols, cols + 2               # tolist() since python indexes lists fastest
+
+
+def toIndex(position, width):
+    return (position[0] + 1) * width + (position[1] + 1)  # (row, col) -> flat index into the padded grid
+
+
+def toPosition(index, width):
+    row, col = divmod(index, width)
+    return row - 1, col - 1  # flat index -> (row, col) in the callers grid
+
+
+def tracePath(parent, index, width):
+    # walks the parent buffer from the given index back to the root, same idea as the old returnPath
+    path = []
+    while index != -1:
+        path.append(toPosition(index, width))
+        index = parent[index]
+    return path[::-1]
+
+
+def visitedMask(closed, rows, width):
+    # closed buffer (bytearray over the padded grid) -> bool array of the cells that got expanded
+    return np.frombuffer(bytes(closed), dtype=bool).reshape(rows + 2, width)[1:-1, 1:-1]
+
+
+def newStats():
+    return {'expanded': 0,         # nodes popped off the open set and closed
+            'generated': 0,        # nodes pushed onto the open set
+            'peak_open': 0,        # biggest the open set ever got
+            'reopened': 0,         # pushes for nodes already on the open set (a cheaper way to them turned up)
+            'heuristic_calls': 0,  # heuristic lookups
+            'path_length': 0,      # steps in the path (0 if no path)
+            'cost': INF,           # total cost of the path
+            'setup_time': 0.0,     # seconds of 'time' spent getting ready (grid prep, heuristic tables) before searching
+            'time': 0.0}           # seconds spent searching
+
+
+def flatTable(values):
+    # numpy array -> flat python array.array of the same numbers, made straight from the array memory so its much
+    # quicker than tolist() on big grids, and indexes nearly as fast as a list
+    values = np.ascontiguousarray(values)
+    if values.dtype.kind in 'biu':
+        table = array.array('q')
+        table.frombytes(values.astype(np.int64, copy=False).ravel().data.cast('B'))
+    else:
+        table = array.array('d')
+        table.frombytes(values.astype(np.float64, copy=False).ravel().data.cast('B'))
+    return table
+
+
+def moveTable(width, options=None):
+    # the moves allowed by the options as (offset, length, side, side), the sides are the offsets of the two cells
+    # a diagonal step goes between (0 for straight steps). worked out once per search, not once per cell
+    moves = [(-width, 1, 0, 0), (-1, 1, 0, 0), (width, 1, 0, 0), (1, 1, 0, 0)]  # up, left, down, right
+    count = (options or {}).get('moves', 4)
+    if count == 8:
+        moves += [(row + col, DIAGONAL, row, col) for row in (-width, width) for col in (-1, 1)]
+    elif count != 4:
+        raise ValueError("moves should be 4 or 8, not " + repr(count))
+    corners = (options or {}).get('corners', 'never')
+    if corners not in CORNERS:
+        raise ValueError("corners should be one of " + ', '.join(CORNERS) + ", not " + repr(corners))
+    return moves, CORNERS[corners]
+
+
+def costTable(options, rows, cols):
+    # flat padded table of the cost of stepping onto each cell and the smallest cost, or (None, 1) if theres no costs
+    costs = (options or {}).get('costs')
+    if costs is None:
+        return None, 1
+    costs = np.asarray(costs)
+    if costs.shape != (rows, cols):
+        raise ValueError("costs should be the same shape as the grid, " + str((rows, cols)) + " not " + str(costs.shape))
+    if costs.size and costs.min() <= 0:
+        raise ValueError("costs should all be above 0")
+    return flatTable(np.pad(costs, 1, mode='constant', constant_values=1)), (costs.min().item() if costs.size else 1)
+
+
+def heuristicTable(options, target, rows, width, scale=1):
+    # flat padded table of the heuristic from every cell to the target, worked out for the whole grid in one go with
+    # numpy so the search just looks it up. scaled by the cheapest cell cost so it stays admissible with costs
+    name = (options or {}).get('heuristic') or ('octile' if (options or {}).get('moves', 4) == 8 else 'manhattan')
+    if name not in HEURISTICS:
+        raise ValueError("heuristic should be one of " + ', '.join(HEURISTICS) + ", not " + repr(name))
+    end_row, end_col = divmod(target, width)
+    row_distance = np.abs(np.arange(rows + 2) - end_row)[:, None]
+    col_distance = np.abs(np.arange(width) - end_col)[None, :]
+    table = HEURISTICS[name](row_distance, col_distance)
+    if scale != 1:
+        table = table * scale
+    return flatTable(table)
+
+
+def tieTable(options, source, target, rows, width, h_table):
+    # what equal f values get sorted on (see 'tie_break'), a flat padded table or None for no tie breaking
+    tie_break = (options or {}).get('tie_break', 'h')
+    if tie_break == 'h':
+        return h_table
+    if tie_break == 'cross':
+        # how far each cell is off the line from the start to the end (cross product of the two directions)
+        start_row, start_col = divmod(source, width)
+        end_row, end_col = divmod(target, width)
+        row_offset = (np.arange(rows + 2) - end_row)[:, None]
+        col_offset = (np.arange(width) - end_col)[None, :]
+        return flatTable(np.abs(row_offset * (start_col - end_col) - col_offset * (start_row - end_row)))
+    if tie_break == 'none':
+        return None
+    raise ValueError("tie_break should be one of " + ', '.join(TIE_BREAKS) + ", not " + repr(tie_break))
+
+
+def fractionalKeys(moves, *tables):
+    # whether a searchs heap keys can have fractions in them (diagonal steps, or a float heuristic/costs table).
+    # those keys are sums of floats done in different orders, so two keys that should be equal come out a tiny bit
+    # apart and the tie break never gets a say, rounding them to KEY_DIGITS makes them really equal again
+    return any(length != 1 for move, length, side, other_side in moves) \
+        or any(table is not None and table.typecode == 'd' for table in tables)
+
+
+def checkUniform(options, name):
+    # for searches that only work when every step costs the same, raises ValueError if the options say otherwise
+    if (options or {}).get('costs') is not None or (options or {}).get('moves', 4) != 4:
+        raise ValueError(name + " only works with 4 moves and no costs")
+
+
+def pathCost(path, costs=None):
+    # cost of walking a (row, col) path, each step costs whatever the cell stepped onto costs (sqrt 2 times that
+    # for a diagonal step)
+    if len(path) < 2:
+        return 0
+    cells = np.array(path)
+    steps = np.abs(np.diff(cells, axis=0)).sum(axis=1)
+    if costs is None and not (steps == 2).any():
+        return len(path) - 1
+    lengths = np.where(steps == 2, DIAGONAL, 1.0)
+    if costs is not None:
+        lengths = lengths * np.asarray(costs)[cells[1:, 0], cells[1:, 1]]
+    return lengths.sum().item()
+
+
+def cellArray(indices, width):
+    # list of flat padded indices -> (k, 2) int array of (row, col), done in one go with numpy
+    rows, cols = np.divmod(np.array(indices, dtype=np.int64), width)
+    return np.column_stack((rows - 1, cols - 1))
+
+
+def finishStats(stats, path, cost, closed, rows, width, t0):
+    if path:
+        stats['path_length'] = len(path) - 1
+        stats['cost'] = cost
+    stats['visited'] = visitedMask(closed, rows, width)
+    stats['time'] += time.perf_counter() - t0
+    return path, stats
+
+
+def runSteps(steps, trace=None):
+    # drives a step generator until the search is over and returns its (path, stats), handing each batch to trace
+    try:
+        while True:
+            cells = next(steps)
+            if trace is not None:
+                trace(*cells)
+    except StopIteration as done:
+        return done.value
+
+
+def runSearch(steps_function, grid, start, end, options=None):
+    # runs a step generator function to the end with the instrumentation hooks from the options:
+    #   'trace'   - called as trace(expanded, generated) with each batch of (row, col) cells, for logging or watching
+    #               a search from a script ('batch' defaults to TRACE_BATCH when theres a trace)
+    #   'profile' - runs the search under cProfile and puts the pstats.Stats in stats['profile'], e.g.
+    #     path, stats = search('A*', walls, start, end, {'profile': True})
+    #     stats['profile'].sort_stats('cumulative').print_stats(10)
+    options = options or {}
+    trace = options.get('trace')
+    if trace is not None and not options.get('batch'):
+        options = dict(options, batch=TRACE_BATCH)
+    profiler = cProfile.Profile() if options.get('profile') else None
+    steps = steps_function(grid, start, end, options)
+    if profiler is not None:
+        profiler.enable()
+    try:
+        path, stats = runSteps(steps, trace)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+    if profiler is not None:
+        stats['profile'] = pstats.Stats(profiler)
+    return path, stats
+
+
+# each search is written as a step generator: (grid, start, end, options) -> generator.
+# if options['batch'] is set, it yields (expanded, generated) every batch expansions, both (k, 2) arrays of the
+# (row, col) cells expanded/added to the open set since the last yield, so a caller can draw the search as it goes,
+# pause it between frames, or just stop pulling from it to cancel. with no batch it never yields (fastest).
+# either way the generator finishes by returning (path, stats), which runSteps hands back.
+# stats['time'] only counts time spent inside the generator, not time paused between yields.
+
+
+def bestFirstSteps(grid, start, end, options, g_weight, h_weight):
+    # shared best-first loop, the open set is a binary heap keyed on g_weight * g + h_weight * h.
+    # A* is (1, 1), dijkstra is (1, 0), greedy best-first is (0, 1).
+    # uses lazy deletion (stale heap entries are skipped when popped) and flat g-score/closed/parent buffers,
+    # the heuristic (and tie break) for every cell comes from a table made before the search starts.
+    t0 = time.perf_counter()
+    stats = newStats()
+    batch = (options or {}).get('batch')
+    blocked, rows, cols, width = prepareGrid(grid, options)
+    moves, corner_limit = moveTable(width, options)
+    costs, cheapest = costTable(options, rows, cols)
+    source = toIndex(start, width)
+    target = toIndex(end, width)
+    closed = bytearray(len(blocked))
+    g = [INF] * len(blocked)      # best known cost to each cell
+    parent = [-1] * len(blocked)  # cell we came from, -1 for the start (and anything not reached)
+    path = []
+
+    if not blocked[source] and not blocked[target]:
+        h_table = heuristicTable(options, target, rows, width, cheapest) if h_weight else None
+        tie_table = tieTable(options, source, target, rows, width, h_table) if h_weight else None
+        rounding = fractionalKeys(moves, costs, h_table)
+        expanded = generated = peak_open = reopened = 0
+        expanded_batch, generated_batch = [], []
+
+        g[source] = 0
+        h = h_table[source] if h_table else 0
+        to_visit = [(h_weight * h, tie_table[source] if tie_table else 0, source)]  # heap of (key, tie, index)
+        stats['setup_time'] = time.perf_counter() - t0
+
+        while to_visit:
+            key, tie, current = heapq.heappop(to_visit)
+            if closed[current]:
+                continue  # lazy deletion, a better copy of this cell was already expanded
+            closed[current] = 1
+            expanded += 1
+            if current == target:
+                path = tracePath(parent, current, width)
+                break
+
+            current_g = g[current]
+            for move, length, side, other_side in moves:
+                child = current + move
+                if blocked[child] or closed[child]:
+                    continue  # wall or already done
+                if side and blocked[current + side] + blocked[current + other_side] > corner_limit:
+                    continue  # diagonal step past too many wall corners
+                child_g = current_g + (length if costs is None else costs[child] * length)
+                if child_g >= g[child]:
+                    continue  # we already know a path to it thats at least as good
+                if g[child] < INF:
+                    reopened += 1  # its already on the open set, the copy there goes stale
+                g[child] = child_g
+                parent[child] = current
+                key = g_weight * child_g + h_weight * h_table[child] if h_table else child_g
+                if rounding:
+                    key = round(key, KEY_DIGITS)
+                heapq.heappush(to_visit, (key, tie_table[child] if tie_table else 0, child))  # old entries go stale
+                generated += 1
+                if batch:
+                    generated_batch.append(child)
+            if len(to_visit) > peak_open:
+                peak_open = len(to_visit)
+
+            if batch:
+                expanded_batch.append(current)
+                if len(expanded_batch) >= batch:
+                    stats['time'] += time.perf_counter() - t0
+                    yield cellArray(expanded_batch, width), cellArray(generated_batch, width)
+                    t0 = time.perf_counter()
+                    expanded_batch, generated_batch = [], []
+
+        if batch and (expanded_batch or generated_batch):  # whatever didnt fill a whole batch
+            stats['time'] += time.perf_counter() - t0
+            yield cellArray(expanded_batch, width), cellArray(generated_batch, width)
+            t0 = time.perf_counter()
+
+        stats['expanded'] = expanded
+        stats['generated'] = generated
+        stats['peak_open'] = peak_open
+        stats['reopened'] = reopened
+        stats['heuristic_calls'] = generated + 1 if h_table else 0  # one table lookup per push
+    return finishStats(stats, path, g[target], closed, rows, width, t0)
+
+
+def aStarSteps(grid, start, end, options=None):
+    return (yield from bestFirstSteps(grid, start, end, options, 1, 1))
+
+
+def dijkstraSteps(grid, start, end, options=None):
+    return (yield from bestFirstSteps(grid, start, end, options, 1, 0))
+
+
+def greedySteps(grid, start, end, options=None):
+    # greedy best-first only looks at the distance to the end, fast but the path isnt always the shortest
+    return (yield from bestFirstSteps(grid, start, end, options, 0, 1))
+
+
+def breadthFirstSteps(grid, start, end, options=None):
+    # plain BFS, on a grid where every step costs 1 this finds the shortest path without needing a heap.
+    # it goes by number of steps, so with costs or diagonal moves its path has the fewest steps but might not be cheapest
+    t0 = time.perf_counter()
+    stats = newStats()
+    batch = (options or {}).get('batch')
+    blocked, rows, cols, width = prepareGrid(grid, options)
+    moves, corner_limit = moveTable(width, options)
+    source = toIndex(start, width)
+    target = toIndex(end, width)
+    closed = bytearray(len(blocked))  # for BFS a cell is closed as soon as its found, it can never get cheaper
+    parent = [-1] * len(blocked)
+    path = []
+
+    if not blocked[source] and not blocked[target]:
+        closed[source] = 1
+        frontier = [source]  # one list per layer, a layer is every cell the same number of steps from the start
+        expanded = generated = peak_open = 0
+        expanded_batch, generated_batch = [], []
+        stats['setup_time'] = time.perf_counter() - t0
+        while frontier and not path:
+            next_frontier = []
+            for current in frontier:
+                expanded += 1
+                if current == target:
+                    path = tracePath(parent, current, width)
+                    break
+                for move, length, side, other_side in moves:
+                    child = current + move
+                    if blocked[child] or closed[child]:
+                        continue
+                    if side and blocked[current + side] + blocked[current + other_side] > corner_limit:
+                        continue
+                    closed[child] = 1
+                    parent[child] = current
+                    next_frontier.append(child)
+                    if batch:
+                        generated_batch.append(child)
+
+                if batch:
+                    expanded_batch.append(current)
+                    if len(expanded_batch) >= batch:
+                        stats['time'] += time.perf_counter() - t0
+                        yield cellArray(expanded_batch, width), cellArray(generated_batch, width)
+                        t0 = time.perf_counter()
+                        expanded_batch, generated_batch = [], []
+            generated += len(next_frontier)
+            if len(next_frontier) > peak_open:
+                peak_open = len(next_frontier)
+            frontier = next_frontier
+
+        if batch and (expanded_batch or generated_batch):  # whatever didnt fill a whole batch
+            stats['time'] += time.perf_counter() - t0
+            yield cellArray(expanded_batch, width), cellArray(generated_batch, width)
+            t0 = time.perf_counter()
+
+        stats['expanded'] = expanded
+        stats['generated'] = generated
+        stats['peak_open'] = peak_open
+    return finishStats(stats, path, pathCost(path, (options or {}).get('costs')), closed, rows, width, t0)
+
+
+def bidirectionalAStarSteps(grid, start, end, options=None):
+    # runs A* forwards from the start and backwards from the end at the same time, always growing the smaller side.
+    # best holds the cheapest start->end path seen where the two searches touched, and its done once neither
+    # open set can beat it anymore (any unfound path has to go through a node in both open sets).
+    t0 = time.perf_counter()
+    stats = newStats()
+    batch = (options or {}).get('batch')
+    blocked, rows, cols, width = prepareGrid(grid, options)
+    moves, corner_limit = moveTable(width, options)
+    costs, cheapest = costTable(options, rows, cols)
+    source = toIndex(start, width)
+    target = toIndex(end, width)
+    closed = bytearray(len(blocked))  # union of both sides, only used for the visited mask
+    path = []
+    best = INF
+
+    if not blocked[source] and not blocked[target]:
+        size = len(blocked)
+        # index 0 is the forward search (heading for the end), index 1 is the backward search (heading for the start)
+        g = ([INF] * size, [INF] * size)
+        parent = ([-1] * size, [-1] * size)
+        done = (bytearray(size), bytearray(size))
+        heuristic = (heuristicTable(options, target, rows, width, cheapest),
+                     heuristicTable(options, source, rows, width, cheapest))
+        tie = (tieTable(options, source, target, rows, width, heuristic[0]),
+               tieTable(options, target, source, rows, width, heuristic[1]))
+        rounding = fractionalKeys(moves, costs, *heuristic)
+        g[0][source] = 0
+        g[1][target] = 0
+        to_visit = ([(heuristic[0][source], 0, source)], [(heuristic[1][target], 0, target)])  # (f, tie, index)
+        meet = -1
+        expanded = generated = peak_open = reopened = 0
+        expanded_batch, generated_batch = [], []
+        stats['setup_time'] = time.perf_counter() - t0
+
+        while to_visit[0] and to_visit[1]:
+            if max(to_visit[0][0][0], to_visit[1][0][0]) >= (round(best, KEY_DIGITS) if rounding else best):
+                break  # nothing left in either open set can make a cheaper path (keys and best rounded alike)
+            side = 0 if len(to_visit[0]) <= len(to_visit[1]) else 1
+            other = 1 - side
+            f, current_tie, current = heapq.heappop(to_visit[side])
+            if done[side][current]:
+                continue
+            done[side][current] = 1
+            closed[current] = 1
+            expanded += 1
+
+            g_side, g_other, h, tie_side = g[side], g[other], heuristic[side], tie[side]
+            current_g = g_side[current]
+            for move, length, corner, other_corner in moves:
+                child = current + move
+                if blocked[child] or done[side][child]:
+                    continue
+                if corner and blocked[current + corner] + blocked[current + other_corner] > corner_limit:
+                    continue
+                if costs is not None:  # the backward search walks the path the wrong way, so it pays for current
+                    length *= costs[child] if side == 0 else costs[current]
+                child_g = current_g + length
+                if child_g >= g_side[child]:
+                    continue
+                if g_side[child] < INF:
+                    reopened += 1
+                g_side[child] = child_g
+                parent[side][child] = current
+                key = round(child_g + h[child], KEY_DIGITS) if rounding else child_g + h[child]
+                heapq.heappush(to_visit[side], (key, tie_side[child] if tie_side else 0, child))
+                generated += 1
+                if batch:
+                    generated_batch.append(child)
+                if child_g + g_other[child] < best:  # the other side has reached this cell too, so theres a path
+                    best = child_g + g_other[child]
+                    meet = child
+            if len(to_visit[0]) + len(to_visit[1]) > peak_open:
+                peak_open = len(to_visit[0]) + len(to_visit[1])
+
+            if batch:
+                expanded_batch.append(current)
+                if len(expanded_batch) >= batch:
+                    stats['time'] += time.perf_counter() - t0
+                    yield cellArray(expanded_batch, width), cellArray(generated_batch, width)
+                    t0 = time.perf_counter()
+                    expanded_batch, generated_batch = [], []
+
+        if batch and (expanded_batch or generated_batch):  # whatever didnt fill a whole batch
+            stats['time'] += time.perf_counter() - t0
+            yield cellArray(expanded_batch, width), cellArray(generated_batch, width)
+            t0 = time.perf_counter()
+
+        if source == target:
+            path = [toPosition(source, width)]
+            best = 0
+        elif meet != -1:
+            path = tracePath(parent[0], meet, width) + tracePath(parent[1], meet, width)[::-1][1:]
+        stats['expanded'] = expanded
+        stats['generated'] = generated
+        stats['peak_open'] = peak_open
+        stats['reopened'] = reopened
+        stats['heuristic_calls'] = generated + 2
+    return finishStats(stats, path, best, closed, rows, width, t0)
+
+
+def jumpPointSteps(grid, start, end, options=None):
+    # jump point search for 4-connected grids with uniform cost.
+    # paths are made canonical by allowing turns from horizontal to vertical anywhere, but from vertical to horizontal
+    # only at "forced" cells (where a wall behind stops opens up beside us). so instead of adding every cell to the
+    # open set, we "jump" in straight lines and only stop at cells where the path could need to turn.
+    # the jumps rely on every step costing the same, so costs and diagonal moves arent supported.
+    checkUniform(options, 'JPS')
+    t0 = time.perf_counter()
+    stats = newStats()
+    batch = (options or {}).get('batch')
+    blocked, rows, cols, width = prepareGrid(grid, options)
+    source = toIndex(start, width)
+    target = toIndex(end, width)
+    closed = bytearray(len(blocked))
+    g = [INF] * len(blocked)
+    parent = [-1] * len(blocked)
+    arrived = [0] * len(blocked)  # the move used to reach each jump point, tells us which ways to look from it
+    path = []
+
+    def jumpVertical(current, step):
+        # walks up or down from current, returns the first jump point it finds or -1 if it hits a wall
+        current += step
+        while not blocked[current]:
+            if current == target:
+                return current
+            if (not blocked[current - 1] and blocked[current - step - 1]) \
+                    or (not blocked[current + 1] and blocked[current - step + 1]):
+                return current  # opening to the side that couldnt have been reached going sideways earlier
+            current += step
+        return -1
+
+    def jumpHorizontal(current, step):
+        # walks left or right, a cell is a jump point if it is the end, or if a vertical jump from it finds one
+        current += step
+        while not blocked[current]:
+            if current == target or jumpVertical(current, -width) != -1 or jumpVertical(current, width) != -1:
+                return current
+            current += step
+        return -1
+
+    if not blocked[source] and not blocked[target]:
+        end_row, end_col = divmod(target, width)
+        expanded = generated = peak_open = reopened = 0
+        expanded_batch, generated_batch = [], []
+        g[source] = 0
+        to_visit = [(abs(source // width - end_row) + abs(source % width - end_col), 0, source)]
+        stats['setup_time'] = time.perf_counter() - t0
+
+        while to_visit:
+            f, h, current = heapq.heappop(to_visit)
+            if closed[current]:
+                continue
+            closed[current] = 1
+            expanded += 1
+            if current == target:
+                jump = current
+                while jump != source:  # fill in the straight lines between the jump points
+                    previous, step = parent[jump], arrived[jump]
+                    while jump != previous:
+                        path.append(toPosition(jump, width))
+                        jump -= step
+                path.append(toPosition(source, width))
+                path = path[::-1]
+                break
+
+            move = arrived[current]
+            if move == 0:
+                directions = (-width, -1, width, 1)  # start looks every way
+            elif move in (-1, 1):
+                directions = (move, -width, width)   # going sideways can keep going or turn up/down
+            else:
+                directions = [move]                  # going up/down only turns at forced openings
+                if not blocked[current - 1] and blocked[current - move - 1]:
+                    directions.append(-1)
+                if not blocked[current + 1] and blocked[current - move + 1]:
+                    directions.append(1)
+
+            for direction in directions:
+                if direction in (-1, 1):
+                    jump = jumpHorizontal(current, direction)
+                else:
+                    jump = jumpVertical(current, direction)
+                if jump == -1 or closed[jump]:
+                    continue
+                jump_row, jump_col = divmod(jump, width)
+                jump_g = g[current] + abs(jump - current) // abs(direction)  # straight line, so distance is steps
+                if jump_g >= g[jump]:
+                    continue
+                if g[jump] < INF:
+                    reopened += 1
+                g[jump] = jump_g
+                parent[jump] = current
+                arrived[jump] = direction
+                h = abs(jump_row - end_row) + abs(jump_col - end_col)
+                heapq.heappush(to_visit, (jump_g + h, h, jump))
+                generated += 1
+                if batch:
+                    generated_batch.append(jump)
+            if len(to_visit) > peak_open:
+                peak_open = len(to_visit)
+
+            if batch:
+                expanded_batch.append(current)
+                if len(expanded_batch) >= batch:
+                    stats['time'] += time.perf_counter() - t0
+                    yield cellArray(expanded_batch, width), cellArray(generated_batch, width)
+                    t0 = time.perf_counter()
+                    expanded_batch, generated_batch = [], []
+
+        if batch and (expanded_batch or generated_batch):  # whatever didnt fill a whole batch
+            stats['time'] += time.perf_counter() - t0
+            yield cellArray(expanded_batch, width), cellArray(generated_batch, width)
+            t0 = time.perf_counter()
+
+        stats['expanded'] = expanded
+        stats['generated'] = generated
+        stats['peak_open'] = peak_open
+        stats['reopened'] = reopened
+        stats['heuristic_calls'] = generated + 1  # worked out for every jump point pushed
+    return finishStats(stats, path, g[target], closed, rows, width, t0)
+
+
+def aStarSearch(grid, start, end, options=None):
+    # returns (path, stats), path is a list of (row, col) from start to end, empty if theres no path.
+    return runSearch(aStarSteps, grid, start, end, options)
+
+
+def dijkstraSearch(grid, start, end, options=None):
+    return runSearch(dijkstraSteps, grid, start, end, options)
+
+
+def greedySearch(grid, start, end, options=None):
+    return runSearch(greedySteps, grid, start, end, options)
+
+
+def breadthFirstSearch(grid, start, end, options=None):
+    return runSearch(breadthFirstSteps, grid, start, end, options)
+
+
+def bidirectionalAStarSearch(grid, start, end, options=None):
+    return runSearch(bidirectionalAStarSteps, grid, start, end, options)
+
+
+def jumpPointSearch(grid, start, end, options=None):
+    return runSearch(jumpPointSteps, grid, start, end, options)
+
+
+# every search has the same interface: (grid, start, end, options) -> (path, stats)
+ALGORITHMS = {'A*': aStarSearch,
+              'Dijkstra': dijkstraSearch,
+              'BFS': breadthFirstSearch,
+              'Greedy': greedySearch,
+              'Bidirectional A*': bidirectionalAStarSearch,
+              'JPS': jumpPointSearch}
+
+# same searches as step generators, for running them a bit at a time
+STEPS = {'A*': aStarSteps,
+         'Dijkstra': dijkstraSteps,
+         'BFS': breadthFirstSteps,
+         'Greedy': greedySteps,
+         'Bidirectional A*': bidirectionalAStarSteps,
+         'JPS': jumpPointSteps}
+
+
+def search(algorithm, grid, start, end, options=None):
+    # runs the search registered under the given name
+    return ALGORITHMS[algorithm](grid, start, end, options)
@@ -0,0 +1,160 @@
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from SearchEngine import STEPS, newStats
+
+# runs searches off the main thread so the window (or a script) never has to wait on them.
+# mode 'thread' runs them on worker threads (cheap to start, good for keeping a window responsive),
+# mode 'process' runs them in worker processes so several searches really do run at once on a multi-core box.
+# each search streams its progress back through one queue and can be cancelled or given a timeout, e.g.
+#   executor = SearchExecutor('process')
+#   jobs = executor.submitMany('A*', walls, [((0, 0), (99, 99)), ((5, 5), (50, 80))])
+#   results = [job.result() for job in jobs]
+#   executor.shutdown()
+
+CHECK_EVERY = 1024  # nodes expanded between cancel/timeout checks when nobody wants progress updates
+
+
+def openGrid(grid_source):
+    # worker side, grid_source is either the grid itself or ('shm', name, shape) for a shared memory block
+    if isinstance(grid_source, tuple) and grid_source[0] == 'shm':
+        block = shared_memory.SharedMemory(name=grid_source[1])
+        return block, np.ndarray(grid_source[2], dtype=bool, buffer=block.buf)
+    return None, grid_source
+
+
+def runJob(job_id, algorithm, grid_source, start, end, options, batch, progress, cancel, timeout):
+    # the part that actually runs on the worker, steps through the search checking for cancel/timeout between batches.
+    # returns (path, stats) like any search, stats['status'] says if it finished ('done'), or was 'cancelled'/'timeout'.
+    block, grid = openGrid(grid_source)
+    t0 = time.perf_counter()
+    status = 'cancelled'
+    steps = STEPS[algorithm](grid, start, end, dict(options or {}, batch=batch))
+    try:
+        while not cancel.is_set():
+            expanded, generated = next(steps)
+            if progress is not None:
+                progress.put((job_id, expanded, generated))
+            if timeout is not None and time.perf_counter() - t0 > timeout:
+                status = 'timeout'
+                break
+    except StopIteration as done:
+        path, stats = done.value
+        stats['status'] = 'done'
+        return path, stats
+    finally:
+        if block is not None:
+            del grid  # the array has to let go of the buffer before the block can close
+            block.close()
+    steps.close()
+    stats = newStats()
+    stats['status'] = status
+    stats['time'] = time.perf_counter() - t0
+    return [], stats
+
+
+class SearchJob:
+    # handle for one submitted search
+    def __init__(self, job_id, start, end, future, cancel_event):
+        self.job_id = job_id
+        self.start = start
+        self.end = end
+        self.future = future
+        self.cancel_event = cancel_event
+
+    def cancel(self):
+        self.cancel_event.set()  # a running search stops at its next batch
+        self.future.cancel()     # one still waiting in the queue never starts
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        # waits for the search, returns (path, stats). a job cancelled before it started gives ([], {'status': 'cancelled'})
+        if self.future.cancelled():
+            stats = newStats()
+            stats['status'] = 'cancelled'
+            return [], stats
+        return self.future.result(timeout)
+
+
+class SearchExecutor:
+    def __init__(self, mode='thread', workers=None):
+        self.mode = mode
+        self.ids = itertools.count()
+        self.jobs = {}  # job_id -> SearchJob, for anything not finished yet
+        if mode == 'thread':
+            self.pool = ThreadPoolExecutor(max_workers=workers)
+            self.manager = None
+            self.progress_queue = queue.Queue()
+        elif mode == 'process':
+            context = multiprocessing.get_context('spawn')  # spawn so workers dont inherit pygame/SDL state from a window
+            self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            self.manager = context.Manager()  # queues/events that can be handed to pool workers
+            self.progress_queue = self.manager.Queue()
+        else:
+            raise ValueError("mode should be 'thread' or 'process', not " + repr(mode))
+
+    def submitMany(self, algorithm, grid, pairs, options=None, progress=False, timeout=None, batch=None):
+        # queues a search for each (start, end) pair on the same grid, returns a list of SearchJob.
+        # the grid is copied once (into shared memory for processes) and every job reads that same copy,
+        # so later edits to the callers grid dont affect searches already queued.
+        # with progress=True each job puts (job_id, expanded, generated) on the progress queue every batch nodes.
+        walls = np.array(grid, dtype=bool)
+        batch = batch or CHECK_EVERY
+        if self.mode == 'process':
+            block = shared_memory.SharedMemory(create=True, size=max(walls.nbytes, 1))
+            np.ndarray(walls.shape, dtype=bool, buffer=block.buf)[:] = walls
+            grid_source = ('shm', block.name, walls.shape)
+            remaining = [len(pairs)]
+            lock = threading.Lock()
+
+            def release(future):
+                with lock:
+                    remaining[0] -= 1
+                    if remaining[0] == 0:  # last job on this grid is done with it
+                        block.close()
+                        block.unlink()
+        else:
+            grid_source = walls
+
+        jobs = []
+        for start, end in pairs:
+            job_id = next(self.ids)
+            cancel_event = self.manager.Event() if self.manager is not None else threading.Event()
+            future = self.pool.submit(runJob, job_id, algorithm, grid_source, tuple(start), tuple(end), options, batch,
+                                      self.progress_queue if progress else None, cancel_event, timeout)
+            job = SearchJob(job_id, tuple(start), tuple(end), future, cancel_event)
+            self.jobs[job_id] = job
+            future.add_done_callback(lambda finished, job_id=job_id: self.jobs.pop(job_id, None))
+            if self.mode == 'process':
+                future.add_done_callback(release)
+            jobs.append(job)
+        if self.mode == 'process' and not pairs:
+            block.close()
+            block.unlink()
+        return jobs
+
+    def submit(self, algorithm, grid, start, end, options=None, progress=False, timeout=None, batch=None):
+        return self.submitMany(algorithm, grid, [(start, end)], options, progress, timeout, batch)[0]
+
+    def progress(self):
+        # everything put on the progress queue since the last call, as a list of (job_id, expanded, generated)
+        updates = []
+        while True:
+            try:
+                updates.append(self.progress_queue.get_nowait())
+            except queue.Empty:
+                return updates
+
+    def shutdown(self, wait=True):
+        for job in list(self.jobs.values()):  # running searches would otherwise keep going until they finish
+            job.cancel()
+        self.pool.shutdown(wait=wait, cancel_futures=True)
+        if self.manager is not None:
+            self.manager.shutdown()